@@ -0,0 +1,144 @@
+import os
+import weakref
+import numpy as np
+
+
+class AudioCaptureBuffer:
+    """
+    Preallocated float32 store for a whole recording session.
+
+    The session buffer doubles its capacity when it fills up, so appending a chunk never
+    reallocates per chunk. `view` hands out zero-copy NumPy views of the recorded samples;
+    a view stays valid after later appends because growth copies into a new array.
+    The last `live_samples` samples are also kept in a ring for the live waveform. Every
+    sample is written twice, `live_samples` apart, so the ring can always be read as one
+    contiguous slice.
+    """
+
+    def __init__(self, sample_rate=16000, initial_seconds=60, live_samples=80000):
+        self.sample_rate = sample_rate
+        self.length = 0
+        self._data = np.zeros(int(sample_rate * initial_seconds), dtype=np.float32)
+        self.live_samples = live_samples
+        self._ring = np.zeros(2 * live_samples, dtype=np.float32)
+        self._ring_position = 0
+
+    def append(self, frames):
+        samples = np.frombuffer(frames, dtype=np.float32) if isinstance(frames, (bytes, bytearray)) else frames
+        n = len(samples)
+        if self.length + n > len(self._data):
+            self._grow(max(2 * len(self._data), self.length + n))
+        self._data[self.length:self.length + n] = samples
+        self.length += n
+        self._append_live(samples)
+
+    def _grow(self, capacity):
+        data = np.zeros(capacity, dtype=np.float32)
+        data[:self.length] = self._data[:self.length]
+        self._data = data
+
+    def _append_live(self, samples):
+        samples = samples[-self.live_samples:]
+        n = len(samples)
+        start = self._ring_position
+        first = min(n, self.live_samples - start)
+        for offset in (0, self.live_samples):
+            self._ring[offset + start:offset + start + first] = samples[:first]
+            self._ring[offset:offset + n - first] = samples[first:]
+        self._ring_position = (start + n) % self.live_samples
+
+    def view(self, start=0, stop=None):
+        stop = self.length if stop is None else min(stop, self.length)
+        return self._data[start:stop]
+
+    def live_view(self):
+        # The most recent samples, oldest first, at most `live_samples` of them.
+        n = min(self.length, self.live_samples)
+        end = self._ring_position + self.live_samples
+        return self._ring[end - n:end]
+
+    def as_bytes(self, start=0, stop=None):
+        # Zero-copy bytes-like view, for APIs such as PyAudio that expect raw bytes.
+        return memoryview(self.view(start, stop)).cast("B")
+
+    def __len__(self):
+        return self.length
+
+
+class DiskAudioCaptureBuffer(AudioCaptureBuffer):
+    """
+    AudioCaptureBuffer whose session samples live in a preallocated raw float32 file
+    instead of RAM, so resident memory stays flat however long the recording gets.
+
+    Samples are written through a writable np.memmap and views are memmap slices, which
+    the OS pages in on demand. The file is flushed every `flush_seconds`, so after a crash
+    it still holds the recording (followed by zeros up to the preallocated size).
+
+    A mapped file cannot be resized on Windows, so growing copies the samples into a new,
+    larger file (`name.1.f32`, `name.2.f32`, ...) and `path` always names the current one.
+    Files that are no longer needed are removed once the last view mapping them is released.
+    """
+
+    def __init__(self, path, sample_rate=16000, initial_seconds=600, live_samples=80000, flush_seconds=1.0):
+        self.path = path
+        self._base_path = path
+        self._generation = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._data = np.memmap(path, dtype=np.float32, mode="w+", shape=(int(sample_rate * initial_seconds),))
+        self.sample_rate = sample_rate
+        self.length = 0
+        self.live_samples = live_samples
+        self._ring = np.zeros(2 * live_samples, dtype=np.float32)
+        self._ring_position = 0
+        self.flush_samples = int(sample_rate * flush_seconds)
+        self._flushed_length = 0
+
+    def append(self, frames):
+        super().append(frames)
+        if self.length - self._flushed_length >= self.flush_samples:
+            self.flush()
+
+    def _grow(self, capacity):
+        # Views handed out earlier keep mapping the old file, which stays until they are released.
+        self._generation += 1
+        root, extension = os.path.splitext(self._base_path)
+        path = f"{root}.{self._generation}{extension}"
+        data = np.memmap(path, dtype=np.float32, mode="w+", shape=(capacity,))
+        data[:self.length] = self._data[:self.length]
+        data.flush()
+        _remove_when_released(self._data, self.path)
+        self._data = data
+        self.path = path
+        self._flushed_length = self.length
+
+    def flush(self):
+        self._data.flush()
+        self._flushed_length = self.length
+
+    def close(self, delete=False):
+        self.flush()
+        if delete:
+            # Jobs may still hold views of the recording, the file goes when they let go of them.
+            _remove_when_released(self._data, self.path)
+            self._data = np.zeros(0, dtype=np.float32)
+            return
+        # Trims the preallocated tail so the file holds exactly the recorded samples.
+        self._data = np.zeros(0, dtype=np.float32)
+        try:
+            with open(self.path, "r+b") as f:
+                f.truncate(self.length * 4)
+        except OSError as e:
+            # Windows refuses while another view still maps the file, the recording itself is intact.
+            print(f"Could not finalize capture file {self.path}: {e}")
+
+
+def _remove_when_released(memmap, path):
+    # The mmap object is only freed (and the file unmapped) once the memmap and every view of it are gone.
+    weakref.finalize(memmap._mmap, _remove_file, path)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError as e:
+        print(f"Could not remove capture file {path}: {e}")
@@ -0,0 +1,97 @@
+import time
+import numpy as np
+import pyaudio
+
+
+class TimestampedFrameQueue:
+    """
+    Fixed-size ring of (timestamp, samples) blocks with one writer and any number of readers.
+
+    The writer (the PortAudio callback) never blocks or waits for readers: it overwrites the
+    oldest slot and bumps a sequence number. Each reader keeps its own position and drains at
+    its own pace; a reader that falls more than `capacity` blocks behind skips the lost blocks
+    and counts them in `missed_blocks`.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self.sequence = 0
+
+    def put(self, timestamp, samples):
+        # The slot records its sequence number, so readers can tell an overwritten slot from the block they expect.
+        self._slots[self.sequence % self.capacity] = (self.sequence, timestamp, samples)
+        self.sequence += 1
+
+    def reader(self):
+        return FrameQueueReader(self)
+
+
+class FrameQueueReader:
+    def __init__(self, frame_queue):
+        self.frame_queue = frame_queue
+        self.position = frame_queue.sequence
+        self.missed_blocks = 0
+
+    def read(self):
+        capacity = self.frame_queue.capacity
+        end = self.frame_queue.sequence
+        start = max(self.position, end - capacity)
+        slots = [self.frame_queue._slots[i % capacity] for i in range(start, end)]
+        # The writer may have lapped the oldest slots while they were being copied, those now hold newer blocks.
+        # Everything up to the last overwritten slot is dropped so the returned blocks stay consecutive.
+        first_valid = start
+        for i, slot in zip(range(start, end), slots):
+            if slot[0] != i:
+                first_valid = i + 1
+        blocks = [slot[1:] for slot in slots[first_valid - start:]]
+        self.missed_blocks += first_valid - self.position
+        self.position = end
+        return blocks
+
+
+class CallbackAudioCapture:
+    """
+    Callback-driven PortAudio input. Each block is copied into a TimestampedFrameQueue
+    from the PortAudio thread, so slow consumers can never hold capture back.
+    """
+
+    def __init__(self, sample_rate=16000, chunk_size=1024, queue_seconds=10):
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.frames = TimestampedFrameQueue(max(1, int(queue_seconds * sample_rate / chunk_size)))
+        self.input_overflows = 0
+        self.audio = None
+        self.stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        self.frames.put(time.perf_counter(), np.frombuffer(in_data, dtype=np.float32).copy())
+        if status & pyaudio.paInputOverflow:
+            self.input_overflows += 1
+        return (None, pyaudio.paContinue)
+
+    def start(self):
+        if self.is_running():
+            return
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(
+            format=pyaudio.paFloat32,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.chunk_size,
+            stream_callback=self._callback
+        )
+        self.stream.start_stream()
+
+    def stop(self):
+        if self.stream is None:
+            return
+        self.stream.stop_stream()
+        self.stream.close()
+        self.audio.terminate()
+        self.audio = None
+        self.stream = None
+
+    def is_running(self):
+        return self.stream is not None and self.stream.is_active()
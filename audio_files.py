@@ -0,0 +1,42 @@
+import glob
+import os
+import wave
+from math import gcd
+import numpy as np
+
+
+def find_wav_files(path_or_pattern):
+    if os.path.isdir(path_or_pattern):
+        return sorted(glob.glob(os.path.join(path_or_pattern, "*.wav")))
+    return sorted(glob.glob(path_or_pattern))
+
+
+def load_wav(path, sample_rate=16000):
+    """
+    Reads a PCM WAV file as mono float32 in [-1, 1] at `sample_rate`, the format
+    the recorder and the models work with.
+    """
+    with wave.open(path, "rb") as wf:
+        n_channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        file_sample_rate = wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+
+    if sample_width == 1:
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768
+    elif sample_width == 4:
+        audio = np.frombuffer(frames, dtype=np.int32).astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported sample width of {sample_width} bytes in {path}")
+
+    if n_channels > 1:
+        audio = audio.reshape(-1, n_channels).mean(axis=1)
+
+    if file_sample_rate != sample_rate:
+        from scipy.signal import resample_poly
+        divisor = gcd(sample_rate, file_sample_rate)
+        audio = resample_poly(audio, sample_rate // divisor, file_sample_rate // divisor)
+
+    return np.ascontiguousarray(audio, dtype=np.float32)
@@ -0,0 +1,135 @@
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from config import Config
+from audio_files import find_wav_files, load_wav
+from window_merge import count_events, get_hop_seconds
+
+HOP_SECONDS = get_hop_seconds()
+# Every worker process loads its own copy of the detectors, so more than a few runs out of memory.
+DEFAULT_WORKERS = 2
+SUMMARY_FIELDS = (
+    ["file", "duration_seconds", "windows", "skipped_windows"]
+    + [f"{model_type}_count" for model_type in Config.MODEL_FILES]
+    + ["total_count", "error"]
+)
+WINDOW_FIELDS = ["file", "window", "start_seconds", "end_seconds", "speech"] + [
+    field for model_type in Config.MODEL_FILES for field in (model_type, f"{model_type}_confidence")
+]
+
+
+def _init_worker(n_threads):
+    import torch
+    torch.set_num_threads(n_threads)
+
+
+def score_file(path):
+    """
+    Scores one WAV file with every detector. Returns the per-file summary and one row per
+    3 second window; errors are reported in the summary instead of stopping the batch.
+    """
+    from inference_client import score_audio
+
+    try:
+        audio = load_wav(path, sample_rate=Config.SAMPLE_RATE)
+        results, speech_mask = score_audio(audio)
+    except Exception as e:
+        return {"file": path, "error": str(e)}, []
+
+    summary = {
+        "file": path,
+        "duration_seconds": round(len(audio) / Config.SAMPLE_RATE, 3),
+        "windows": len(speech_mask),
+        "skipped_windows": int((~speech_mask).sum().item()),
+    }
+    for model_type, (pred, conf) in results.items():
+        summary[f"{model_type}_count"] = int(count_events(pred.reshape(-1), Config.WINDOW_SECONDS, HOP_SECONDS)[0])
+    summary["total_count"] = sum(summary[f"{model_type}_count"] for model_type in results)
+
+    windows = []
+    for index in range(len(speech_mask)):
+        window = {
+            "file": path,
+            "window": index,
+            "start_seconds": index * HOP_SECONDS,
+            "end_seconds": min(index * HOP_SECONDS + Config.WINDOW_SECONDS, summary["duration_seconds"]),
+            "speech": bool(speech_mask[index]),
+        }
+        for model_type, (pred, conf) in results.items():
+            window[model_type] = int(pred.reshape(-1)[index].item())
+            window[f"{model_type}_confidence"] = round(float(conf.reshape(-1)[index].item()), 4)
+        windows.append(window)
+    return summary, windows
+
+
+def score_files(wav_paths, workers=DEFAULT_WORKERS, concurrent_files=4):
+    workers = workers or DEFAULT_WORKERS
+    if workers == 1:
+        # Several files in flight at once let the inference worker batch their windows together.
+        with ThreadPoolExecutor(max_workers=concurrent_files) as executor:
+            yield from executor.map(score_file, wav_paths)
+        return
+    n_threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(n_threads,)) as executor:
+        yield from executor.map(score_file, wav_paths)
+
+
+class RowWriter:
+    """
+    Appends rows to a CSV (fixed `fieldnames`) or JSONL file and flushes after every call,
+    so the rows of finished files survive a crash later in the batch.
+    """
+
+    def __init__(self, path, fieldnames, output_format):
+        self.output_format = output_format
+        self.file = open(path, "w", newline="")
+        if output_format == "csv":
+            self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, restval="")
+            self.writer.writeheader()
+
+    def write_rows(self, rows):
+        if self.output_format == "jsonl":
+            for row in rows:
+                self.file.write(json.dumps(row) + "\n")
+        else:
+            self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score directories of WAV recordings without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="WAV files, directories or glob patterns")
+    parser.add_argument("--output-dir", default="batch_results", help="Where files.<format> and windows.<format> are written")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Worker processes, each loads every detector (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--concurrent-files", type=int, default=4, help="Files scored at once when --workers is 1")
+    args = parser.parse_args()
+
+    wav_paths = []
+    for path in args.inputs:
+        wav_paths += [path] if os.path.isfile(path) else find_wav_files(path)
+    if not wav_paths:
+        parser.error("No WAV files found")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    files_writer = RowWriter(os.path.join(args.output_dir, f"files.{args.format}"), SUMMARY_FIELDS, args.format)
+    windows_writer = RowWriter(os.path.join(args.output_dir, f"windows.{args.format}"), WINDOW_FIELDS, args.format)
+    try:
+        for index, (summary, file_windows) in enumerate(score_files(wav_paths, args.workers, args.concurrent_files), start=1):
+            files_writer.write_rows([summary])
+            windows_writer.write_rows(file_windows)
+            status = f"error: {summary['error']}" if "error" in summary else f"{summary.get('total_count')} disfluencies"
+            print(f"[{index}/{len(wav_paths)}] {summary['file']}: {status}")
+    finally:
+        files_writer.close()
+        windows_writer.close()
+    print(f"Results written to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import torch
+from config import Config
+from audio_files import load_wav
+from audio_buffer import AudioCaptureBuffer
+from get_model_result import get_batched_data, get_checkpoint_path, get_pretrained_model, load_model, run_model
+from syllable_counter import find_syllable_count_from_sentences, find_syllable_count_from_word
+
+CHUNK_SIZE = 1024  # Frames per captured chunk, as in main.py
+LIVE_SECONDS = 5
+
+
+def get_process_rss_mb():
+    # Resident memory of this process, None when it cannot be read (Windows without psutil).
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakRssSampler:
+    """
+    Samples the resident memory of the process on a background thread while the `with` block
+    runs, so every stage gets its own peak instead of the lifetime peak of the process.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        rss = get_process_rss_mb()
+        if rss is not None:
+            self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def synthetic_audio(seconds, seed=0, block_seconds=60):
+    """
+    Speech-like float32 signal: a harmonic voice with a wandering pitch, syllable-rate
+    amplitude modulation, short pauses and background noise. Built a block at a time so
+    hour long signals do not need several full-length temporaries.
+    """
+    rng = np.random.default_rng(seed)
+    audio = np.empty(int(seconds * Config.SAMPLE_RATE), dtype=np.float32)
+    phase = 0.0
+    for start in range(0, len(audio), block_seconds * Config.SAMPLE_RATE):
+        n = min(block_seconds * Config.SAMPLE_RATE, len(audio) - start)
+        t = (start + np.arange(n)) / Config.SAMPLE_RATE
+        pitch = 140 + 40 * np.sin(2 * np.pi * 0.3 * t) + 10 * np.sin(2 * np.pi * 2.1 * t)
+        phases = phase + 2 * np.pi * np.cumsum(pitch) / Config.SAMPLE_RATE
+        phase = phases[-1]
+        voice = sum(np.sin(k * phases) / k for k in range(1, 6))
+        envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.2 * t) > -0.7)
+        audio[start:start + n] = 0.2 * voice * envelope + 0.01 * rng.standard_normal(n)
+    return audio
+
+
+def reference_audio(path, seconds):
+    # The reference recording is repeated (or cut) to the requested length.
+    signal = load_wav(path)
+    return np.resize(signal, int(seconds * Config.SAMPLE_RATE)).astype(np.float32)
+
+
+def synthetic_text(n_words, seed=0, vocabulary_size=5000):
+    # Pseudo-English words drawn with a Zipf-like frequency, so frequent words repeat as in real passages.
+    rng = np.random.default_rng(seed)
+    onsets = ["", "b", "br", "ch", "d", "f", "g", "h", "k", "l", "m", "n", "p", "pr", "r", "s", "st", "t", "th", "tr", "w"]
+    vowels = ["a", "e", "i", "o", "u", "ea", "ou", "ai"]
+    codas = ["", "", "n", "r", "s", "t", "ng", "ck", "st"]
+    vocabulary = [
+        "".join(rng.choice(onsets) + rng.choice(vowels) + rng.choice(codas) for _ in range(rng.integers(1, 5)))
+        for _ in range(vocabulary_size)
+    ]
+    weights = 1 / np.arange(1, vocabulary_size + 1)
+    words = rng.choice(vocabulary, size=n_words, p=weights / weights.sum())
+    sentences = [" ".join(words[start:start + 15]) + "." for start in range(0, n_words, 15)]
+    return "\n".join(" ".join(sentences[start:start + 5]) for start in range(0, len(sentences), 5))
+
+
+def summarize(latencies, work=None, unit=None, peak_rss_mb=None):
+    """
+    p50 / p95 latency in milliseconds over the runs and, when `work` (amount processed per run)
+    is given, the throughput in `unit` per second at the median latency.
+    """
+    latencies = np.asarray(latencies)
+    p50 = float(np.percentile(latencies, 50))
+    return {
+        "runs": len(latencies),
+        "p50_ms": p50 * 1000,
+        "p95_ms": float(np.percentile(latencies, 95)) * 1000,
+        "throughput": work / p50 if work is not None and p50 > 0 else None,
+        "throughput_unit": f"{unit}/s" if unit else None,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def time_runs(function, repeats, warmup=1):
+    for _ in range(warmup):
+        function()
+    latencies = []
+    with PeakRssSampler() as sampler:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            function()
+            latencies.append(time.perf_counter() - start)
+    return latencies, sampler.peak_mb
+
+
+def bench_batching(audio, repeats):
+    latencies, peak = time_runs(lambda: get_batched_data(audio), repeats)
+    return summarize(latencies, len(audio) / Config.SAMPLE_RATE, "audio_seconds", peak)
+
+
+def bench_model_loading(model_type, repeats):
+    path = get_checkpoint_path(model_type)
+    latencies, peak = time_runs(lambda: get_pretrained_model(path), repeats)
+    return summarize(latencies, 1, "models", peak)
+
+
+def bench_forward(model, audio, repeats):
+    # The model is run directly, the result cache, the inference worker and the VAD gate are not involved.
+    batched_data = get_batched_data(audio)
+    latencies, peak = time_runs(lambda: run_model(model, batched_data), repeats, warmup=0)
+    summary = summarize(latencies, len(audio) / Config.SAMPLE_RATE, "audio_seconds", peak)
+    summary["windows"] = int(batched_data.shape[0])
+    return summary
+
+
+def bench_syllables(text, repeats):
+    def count():
+        find_syllable_count_from_word.cache_clear()  # every run starts cold, as on the first count of a new text
+        find_syllable_count_from_sentences(text)
+
+    latencies, peak = time_runs(count, repeats)
+    summary = summarize(latencies, len(text.split()), "words", peak)
+    summary["characters"] = len(text)
+    return summary
+
+
+def bench_waveform(audio, fps=Config.WAVEFORM_FPS):
+    """
+    Feeds `audio` chunk by chunk the way BetterSpeakApp.process_frames does (append to the capture buffer,
+    mark the waveform dirty) and redraws the live waveform on the WAVEFORM_FPS cadence. At the end
+    the full-session overview is drawn, which is what the user sees after stopping the recording.
+    """
+    import pyqtgraph as pg
+    from PyQt5.QtWidgets import QApplication
+    from waveform_renderer import WaveformRenderer
+
+    app = QApplication.instance() or QApplication([])
+    plot_widget = pg.PlotWidget()
+    plot_widget.resize(800, 200)
+    audio_buffer = AudioCaptureBuffer(Config.SAMPLE_RATE, live_samples=Config.SAMPLE_RATE * LIVE_SECONDS)
+    renderer = WaveformRenderer(plot_widget, plot_widget.plot([], []), audio_buffer, LIVE_SECONDS, fps)
+    renderer.timer.stop()  # redraws are driven below so they can be timed
+
+    samples_per_redraw = Config.SAMPLE_RATE / fps
+    process_latencies, redraw_latencies = [], []
+    with PeakRssSampler() as sampler:
+        next_redraw = samples_per_redraw
+        for chunk_start in range(0, len(audio), CHUNK_SIZE):
+            chunk = audio[chunk_start:chunk_start + CHUNK_SIZE].tobytes()  # PyAudio hands over raw bytes
+            start = time.perf_counter()
+            audio_buffer.append(chunk)
+            renderer.mark_dirty()
+            process_latencies.append(time.perf_counter() - start)
+            if len(audio_buffer) >= next_redraw:
+                next_redraw += samples_per_redraw
+                start = time.perf_counter()
+                renderer.redraw()
+                redraw_latencies.append(time.perf_counter() - start)
+
+        renderer.set_overview(True)
+        start = time.perf_counter()
+        renderer.redraw()
+        overview_seconds = time.perf_counter() - start
+    app.processEvents()
+
+    return {
+        "process_frames": summarize(process_latencies, CHUNK_SIZE / Config.SAMPLE_RATE, "audio_seconds", sampler.peak_mb),
+        "waveform_redraw": summarize(redraw_latencies, 1, "redraws", sampler.peak_mb),
+        "waveform_overview_redraw": summarize([overview_seconds], 1, "redraws", sampler.peak_mb),
+    }
+
+
+def get_git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(lengths=(5, 60, 600, 3600), model_types=tuple(Config.MODEL_FILES), text_words=(1000, 10000, 100000),
+                  repeats=5, forward_repeats=1, load_repeats=3, audio_path=None, stages=None):
+    """
+    Times every stage of the capture -> inference -> PSS pipeline separately on audio of each
+    length (synthetic, or `audio_path` repeated to length) and on texts of each word count.
+    Returns {"environment": ..., "stages": {stage: {case: summary}}} with the p50 / p95 latency,
+    throughput and peak RSS of each case.
+    """
+    stages = set(stages or ("batching", "loading", "forward", "syllables", "waveform"))
+    report = {
+        "environment": {
+            "commit": get_git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "cpu_count": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+            "audio": audio_path or "synthetic",
+            "config": {
+                name: getattr(Config, name) for name in (
+                    "INFERENCE_PRECISION", "INFERENCE_BACKEND", "FAST_CHECKPOINTS", "FAST_MODE",
+                    "WINDOW_HOP_SECONDS", "MICRO_BATCH_SIZE", "WAVEFORM_FPS"
+                )
+            },
+        },
+        "stages": {},
+    }
+    results = report["stages"]
+
+    def add(stage, case, summary):
+        results.setdefault(stage, {})[case] = summary
+        throughput = "" if summary["throughput"] is None else f"{summary['throughput']:>12.1f} {summary['throughput_unit']}"
+        peak = "-" if summary["peak_rss_mb"] is None else f"{summary['peak_rss_mb']:.0f} MB"
+        print(f"{stage:<36}{case:>12}{summary['p50_ms']:>12.2f}{summary['p95_ms']:>12.2f}{peak:>10}{throughput}")
+
+    print(f"{'stage':<36}{'case':>12}{'p50 ms':>12}{'p95 ms':>12}{'peak RSS':>10}{'throughput':>12}")
+    if "loading" in stages:
+        for model_type in model_types:
+            add(f"get_pretrained_model/{model_type}", "checkpoint", bench_model_loading(model_type, load_repeats))
+            gc.collect()
+
+    models = {model_type: load_model(model_type) for model_type in model_types} if "forward" in stages else {}
+    for model in models.values():
+        run_model(model, get_batched_data(synthetic_audio(3)))  # warm-up, the first call pays one-off allocation costs
+    for seconds in lengths:
+        case = f"{seconds:g}s"
+        audio = reference_audio(audio_path, seconds) if audio_path else synthetic_audio(seconds)
+        if "batching" in stages:
+            add("get_batched_data", case, bench_batching(audio, repeats))
+        for model_type, model in models.items():
+            add(f"forward/{model_type}", case, bench_forward(model, audio, forward_repeats))
+            gc.collect()
+        if "waveform" in stages:
+            for stage, summary in bench_waveform(audio).items():
+                add(stage, case, summary)
+        del audio
+        gc.collect()
+    models.clear()
+
+    if "syllables" in stages:
+        for n_words in text_words:
+            add("find_syllable_count_from_sentences", f"{n_words}w", bench_syllables(synthetic_text(n_words), repeats))
+
+    peaks = [summary["peak_rss_mb"] for cases in results.values() for summary in cases.values() if summary["peak_rss_mb"] is not None]
+    report["peak_rss_mb"] = max(peaks) if peaks else None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the capture, inference and syllable counting stages and write the results to JSON.")
+    parser.add_argument("--lengths", nargs="+", type=float, default=[5, 60, 600, 3600], help="Audio lengths in seconds")
+    parser.add_argument("--audio", help="Reference WAV recording, repeated to each length (default: synthetic speech-like audio)")
+    parser.add_argument("--model-types", nargs="+", choices=list(Config.MODEL_FILES), default=list(Config.MODEL_FILES))
+    parser.add_argument("--text-words", nargs="+", type=int, default=[1000, 10000, 100000], help="Word counts of the syllable counting texts")
+    parser.add_argument("--stages", nargs="+", choices=["batching", "loading", "forward", "syllables", "waveform"], help="Only run these stages")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs of the fast stages")
+    parser.add_argument("--forward-repeats", type=int, default=1, help="Timed forward passes per length and detector")
+    parser.add_argument("--load-repeats", type=int, default=3, help="Timed model loads per detector")
+    parser.add_argument("--output", default=None, help="JSON file to write (default: benchmark_results/<commit>_<time>.json)")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        args.lengths, args.model_types, args.text_words, args.repeats, args.forward_repeats,
+        args.load_repeats, args.audio, args.stages
+    )
+    output = args.output or os.path.join(
+        "benchmark_results", f"{report['environment']['commit'] or 'unknown'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import csv
+import json
+import os
+import time
+import torch
+import torch.nn as nn
+from config import Config
+from audio_files import load_wav
+from get_model_result import _build_model
+from fast_mode import encode_layers, save_probes
+from window_merge import get_hop_seconds
+
+
+def load_labelled_windows(folder):
+    """
+    Reads `labels.csv` from the folder, one row per 3 second window with the columns
+    file, start_seconds (or window) and one 0/1 column per detector (the windows.csv written by
+    batch_score.py, corrected by hand, has this layout). Empty cells are treated as unlabelled.
+    Returns the windows as a (n_windows, samples) tensor and {model_type: float tensor} with nan for unlabelled.
+    """
+    with open(os.path.join(folder, "labels.csv"), newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    window_samples = Config.SAMPLE_RATE * Config.WINDOW_SECONDS
+    signals = {}
+    windows = []
+    labels = {model_type: [] for model_type in Config.MODEL_FILES}
+    for row in rows:
+        path = os.path.join(folder, os.path.basename(row["file"]))
+        if path not in signals:
+            signals[path] = torch.from_numpy(load_wav(path))
+        if row.get("start_seconds") not in ("", None):
+            start_seconds = float(row["start_seconds"])
+        else:
+            # batch_score.py numbers its windows with the configured hop.
+            start_seconds = int(row["window"]) * get_hop_seconds()
+        begin = int(round(start_seconds * Config.SAMPLE_RATE))
+        if begin >= len(signals[path]):
+            raise ValueError(f"{row['file']}: window at {start_seconds} s is past the end of the recording")
+        window = signals[path][begin:begin + window_samples]
+        windows.append(nn.functional.pad(window, (0, window_samples - len(window))))
+        for model_type in labels:
+            value = row.get(model_type, "")
+            labels[model_type].append(float(value) if value not in ("", None) else float("nan"))
+    return torch.stack(windows), {model_type: torch.tensor(values) for model_type, values in labels.items()}
+
+
+def fit_probe(features, labels, l2=1e-3):
+    # Logistic regression on the pooled projector output of one layer.
+    probe = nn.Linear(features.shape[1], 1)
+    optimizer = torch.optim.LBFGS(probe.parameters(), max_iter=100)
+
+    def closure():
+        optimizer.zero_grad()
+        loss = nn.functional.binary_cross_entropy_with_logits(probe(features).reshape(-1), labels)
+        loss = loss + l2 * probe.weight.pow(2).sum()
+        loss.backward()
+        return loss
+
+    optimizer.step(closure)
+    return probe.eval()
+
+
+def _accuracy(probs, labels):
+    return float((torch.round(probs) == labels).float().mean().item()) if len(labels) else None
+
+
+def calibrate_fast_mode(folder, model_types=tuple(Config.MODEL_FILES), thresholds=(0.8, 0.9, 0.95), save=True, batch_size=8):
+    """
+    Measures, per detector, the accuracy and latency of running only the first N encoder layers,
+    fits an early exit probe for every intermediate layer and simulates early exit at each
+    threshold over Config.EARLY_EXIT_LAYERS. Every fourth window is held out for the accuracies
+    when there are at least 8 labelled windows.
+    """
+    windows, all_labels = load_labelled_windows(folder)
+    report = {}
+    for model_type in model_types:
+        labelled = ~torch.isnan(all_labels[model_type])
+        if not labelled.any():
+            print(f"No labels for {model_type}, skipping")
+            continue
+        model_windows = windows[labelled]
+        labels = all_labels[model_type][labelled]
+        held_out = torch.arange(len(labels)) % 4 == 3 if len(labels) >= 8 else torch.ones(len(labels), dtype=torch.bool)
+        train = ~held_out if len(labels) >= 8 else held_out
+
+        model = _build_model(model_type)
+        wav2vec2 = model.model.wav2vec2
+        head = model.model
+        n_layers = len(wav2vec2.encoder.layers)
+
+        features = {layer: [] for layer in range(1, n_layers + 1)}
+        with torch.no_grad():
+            for start in range(0, len(model_windows), batch_size):
+                for layer, hidden_states in encode_layers(wav2vec2, model_windows[start:start + batch_size]):
+                    features[layer].append(head.projector(hidden_states).mean(dim=1))
+
+            # Cumulative seconds per window after each layer, best of three runs after a warm-up.
+            timing_batch = model_windows[:batch_size]
+            layer_seconds = None
+            for _ in range(4):
+                run_seconds = {}
+                start_time = time.perf_counter()
+                for layer, hidden_states in encode_layers(wav2vec2, timing_batch):
+                    head.classifier(head.projector(hidden_states).mean(dim=1))
+                    run_seconds[layer] = (time.perf_counter() - start_time) / len(timing_batch)
+                layer_seconds = run_seconds if layer_seconds is None else {
+                    layer: min(seconds, layer_seconds[layer]) for layer, seconds in run_seconds.items()
+                }
+        features = {layer: torch.cat(values) for layer, values in features.items()}
+
+        full_probs = torch.sigmoid(head.classifier(features[n_layers])).reshape(-1).detach()
+        probes = {}
+        probe_probs = {}
+        layers_report = {}
+        for layer in range(1, n_layers + 1):
+            with torch.no_grad():
+                probs = torch.sigmoid(head.classifier(features[layer])).reshape(-1)
+            layers_report[layer] = {
+                "accuracy": _accuracy(probs[held_out], labels[held_out]),
+                "agreement": float((torch.round(probs) == torch.round(full_probs)).float().mean().item()),
+                "seconds_per_window": layer_seconds[layer],
+                "probe_accuracy": None,
+            }
+            if layer < n_layers:
+                probes[layer] = fit_probe(features[layer][train], labels[train])
+                with torch.no_grad():
+                    probe_probs[layer] = torch.sigmoid(probes[layer](features[layer])).reshape(-1)
+                layers_report[layer]["probe_accuracy"] = _accuracy(probe_probs[layer][held_out], labels[held_out])
+
+        early_exit_report = {}
+        exit_layers = [layer for layer in sorted(Config.EARLY_EXIT_LAYERS) if layer in probes]
+        for threshold in thresholds:
+            probs = full_probs.clone()
+            exit_layer = torch.full((len(labels),), n_layers)
+            undecided = torch.ones(len(labels), dtype=torch.bool)
+            for layer in exit_layers:
+                confident = undecided & ((probe_probs[layer] >= threshold) | (probe_probs[layer] <= 1 - threshold))
+                probs[confident] = probe_probs[layer][confident]
+                exit_layer[confident] = layer
+                undecided &= ~confident
+            early_exit_report[str(threshold)] = {
+                "accuracy": _accuracy(probs[held_out], labels[held_out]),
+                "mean_layers": float(exit_layer.float().mean().item()),
+                "seconds_per_window": float(sum(layer_seconds[int(layer)] for layer in exit_layer) / len(exit_layer)),
+            }
+
+        report[model_type] = {"windows": len(labels), "layers": layers_report, "early_exit": early_exit_report}
+        if save:
+            save_probes(model_type, probes)
+        del model
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the accuracy / latency trade-off of the fast modes on labelled windows.")
+    parser.add_argument("folder", help="Folder with WAV recordings and a labels.csv (file, window, one 0/1 column per detector)")
+    parser.add_argument("--model-types", nargs="+", choices=list(Config.MODEL_FILES), default=list(Config.MODEL_FILES))
+    parser.add_argument("--thresholds", nargs="+", type=float, default=[0.8, 0.9, 0.95])
+    parser.add_argument("--no-save", action="store_true", help="Do not write the fitted probes to Config.PROBE_PATH")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = calibrate_fast_mode(args.folder, args.model_types, args.thresholds, save=not args.no_save)
+    for model_type, result in report.items():
+        print(f"{model_type} ({result['windows']} windows)")
+        print(f"  {'layers':<8}{'accuracy':>10}{'agreement':>11}{'probe acc':>11}{'ms/window':>11}")
+        for layer, layer_result in result["layers"].items():
+            accuracy = "-" if layer_result["accuracy"] is None else f"{layer_result['accuracy']:.3f}"
+            probe_accuracy = "-" if layer_result["probe_accuracy"] is None else f"{layer_result['probe_accuracy']:.3f}"
+            print(f"  {layer:<8}{accuracy:>10}{layer_result['agreement']:>11.3f}{probe_accuracy:>11}{layer_result['seconds_per_window'] * 1000:>11.1f}")
+        for threshold, exit_result in result["early_exit"].items():
+            accuracy = "-" if exit_result["accuracy"] is None else f"{exit_result['accuracy']:.3f}"
+            print(
+                f"  early exit @ {threshold}: accuracy {accuracy}, {exit_result['mean_layers']:.1f} layers on average, "
+                f"{exit_result['seconds_per_window'] * 1000:.1f} ms/window"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import json
+import time
+import numpy as np
+from config import Config
+from audio_files import find_wav_files, load_wav
+from get_model_result import get_batched_data, get_all_batch_results, get_speech_mask
+from window_merge import count_events
+
+
+def compare_hops(wav_paths, hops=(3, 1.5, 1)):
+    """
+    Scores the given WAV files with every window hop and reports, per hop, the number of
+    windows, the seconds spent, the throughput in audio seconds per second, the cost
+    relative to back to back windows and the de-duplicated event counts.
+    The result cache and the inference worker are bypassed so every window is really run.
+    """
+    signals = [load_wav(path) for path in wav_paths]
+    audio_seconds = sum(len(signal) for signal in signals) / Config.SAMPLE_RATE
+    get_all_batch_results(get_batched_data(signals[0], hop_seconds=Config.WINDOW_SECONDS))  # warm-up
+
+    report = {}
+    for hop in hops:
+        n_windows = 0
+        counts = np.zeros(len(Config.MODEL_FILES), dtype=int)
+        start = time.perf_counter()
+        for signal in signals:
+            batched_data = get_batched_data(signal, hop_seconds=hop)
+            results = get_all_batch_results(batched_data, get_speech_mask(batched_data))
+            n_windows += batched_data.shape[0]
+            predictions = np.stack([results[model_type][0].numpy() for model_type in Config.MODEL_FILES], axis=1)
+            counts += count_events(predictions, Config.WINDOW_SECONDS, hop)
+        seconds = time.perf_counter() - start
+
+        report[str(hop)] = {
+            "windows": n_windows,
+            "seconds": seconds,
+            "audio_seconds_per_second": audio_seconds / seconds,
+            "relative_cost": None,
+            "counts": dict(zip(Config.MODEL_FILES, counts.tolist())),
+        }
+    baseline = report[str(hops[0])]["seconds"]
+    for result in report.values():
+        result["relative_cost"] = result["seconds"] / baseline
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the throughput cost of overlapping window hops on a folder of WAV files.")
+    parser.add_argument("wav_dir", help="Directory (or glob pattern) of WAV recordings")
+    parser.add_argument("--hops", nargs="+", type=float, default=[3, 1.5, 1], help="Hops in seconds, the first one is the baseline")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    wav_paths = find_wav_files(args.wav_dir)
+    if not wav_paths:
+        parser.error(f"No WAV files found in {args.wav_dir}")
+
+    report = compare_hops(wav_paths, args.hops)
+    print(f"{'hop':<6}{'windows':>9}{'seconds':>10}{'audio s/s':>11}{'cost':>8}  counts")
+    for hop, result in report.items():
+        counts = ", ".join(f"{model_type} {count}" for model_type, count in result["counts"].items())
+        print(f"{hop:<6}{result['windows']:>9}{result['seconds']:>10.2f}{result['audio_seconds_per_second']:>11.1f}{result['relative_cost']:>7.2f}x  {counts}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import json
+import time
+import torch
+from config import Config
+from audio_files import find_wav_files, load_wav
+from get_model_result import get_batched_data, load_model, run_model
+from model_precision import PRECISIONS, resolve_precision
+
+
+def compare_precisions(wav_paths, precisions=PRECISIONS, model_types=tuple(Config.MODEL_FILES)):
+    """
+    Runs every detector at every precision over the given WAV files and reports, per precision,
+    how often its window predictions agree with fp32 and how much faster it is.
+    The PyTorch model is compared without fast mode, whatever backend and fast mode the app uses.
+    """
+    fast_mode, Config.FAST_MODE = Config.FAST_MODE, None
+    try:
+        return _compare_precisions(wav_paths, precisions, model_types)
+    finally:
+        Config.FAST_MODE = fast_mode
+
+
+def _compare_precisions(wav_paths, precisions, model_types):
+    batches = [get_batched_data([load_wav(path).tobytes()]) for path in wav_paths]
+    # A precision this CPU falls back from would only repeat the fp32 rows under another name.
+    precisions = [precision for precision in precisions if precision == "fp32" or resolve_precision(precision) == precision]
+    report = {}
+    for model_type in model_types:
+        predictions = {}
+        seconds = {}
+        for precision in ("fp32",) + tuple(p for p in precisions if p != "fp32"):
+            model = load_model(model_type, precision, backend="pytorch")
+            run_model(model, batches[0])  # warm-up, the first call pays one-off allocation costs
+            start = time.perf_counter()
+            predictions[precision] = torch.cat([
+                torch.round(torch.sigmoid(run_model(model, batch))).reshape(-1) for batch in batches
+            ])
+            seconds[precision] = time.perf_counter() - start
+            del model
+
+        report[model_type] = {
+            precision: {
+                "agreement": float((predictions[precision] == predictions["fp32"]).float().mean().item()),
+                "seconds": seconds[precision],
+                "speedup": seconds["fp32"] / seconds[precision],
+            }
+            for precision in predictions
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference precisions on a folder of WAV files.")
+    parser.add_argument("wav_dir", help="Directory (or glob pattern) of WAV recordings")
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--model-types", nargs="+", choices=list(Config.MODEL_FILES), default=list(Config.MODEL_FILES))
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    wav_paths = find_wav_files(args.wav_dir)
+    if not wav_paths:
+        parser.error(f"No WAV files found in {args.wav_dir}")
+
+    report = compare_precisions(wav_paths, args.precisions, args.model_types)
+    print(f"{'model':<14}{'precision':<11}{'agreement':>10}{'seconds':>10}{'speedup':>9}")
+    for model_type, results in report.items():
+        for precision, result in results.items():
+            print(f"{model_type:<14}{precision:<11}{result['agreement']:>10.3f}{result['seconds']:>10.2f}{result['speedup']:>8.2f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,112 @@ import os
 class Config:
     SAVED_W2V2_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_model", "w2v2_architecture")
     SAVED_CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_model")
+    QUANTIZED_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_model", "quantized")
+    EXPORTED_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_model", "exported")
+    MODEL_FILES = {
+        "interjection": "interjection.ckpt",
+        "prolongation": "prolongation.pth",
+        "repetition": "repetition.pth",
+    }
 
+    # Model registry. Set the memory cap to None to keep every model resident.
+    PRELOAD_MODELS = True
+    MODEL_REGISTRY_MAX_MEMORY_MB = None
+
+    # Run the wav2vec2 encoder once for all detectors when the checkpoints share it.
+    MULTI_HEAD_INFERENCE = True
+
+    # Torch intra-op threads for the whole process. None uses every core, split evenly between the
+    # per-detector models while they run concurrently.
+    MODEL_INTRA_OP_THREADS = None
+    MODEL_INTER_OP_THREADS = 1
+
+    # Score each complete 3 second window in the background while recording.
+    STREAMING_INFERENCE = True
+
+    # Voice activity gating. Windows without speech are reported as "no disfluency"
+    # without running the model.
+    VAD_ENABLED = True
+    VAD_ENERGY_THRESHOLD_DB = -40.0
+    VAD_ZCR_THRESHOLD = 0.3
+    VAD_MIN_SPEECH_RATIO = 0.1
+
+    # Inference precision on CPU: "fp32", "int8" (dynamic quantization, cached on disk)
+    # or "bf16" (autocast, falls back to fp32 when the CPU lacks bfloat16 support).
+    INFERENCE_PRECISION = "fp32"
+
+    # "pytorch" builds the HuggingFace models, "torchscript" / "onnx" run the graphs
+    # written by model_export.py instead.
+    INFERENCE_BACKEND = "pytorch"
+
+    # Write captured samples to a memory-mapped file instead of keeping them in RAM.
+    DISK_CAPTURE = False
+    CAPTURE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_recordings", "capture")
+
+    # Callback-driven capture: blocks are queued from PortAudio's thread and drained into the capture buffer
+    # by a writer thread every CAPTURE_DRAIN_INTERVAL_MS. Blocks older than CAPTURE_QUEUE_SECONDS are lost.
+    CALLBACK_CAPTURE = True
+    CAPTURE_QUEUE_SECONDS = 10
+    CAPTURE_DRAIN_INTERVAL_MS = 30
+
+    # Waveform redraws per second, frames received in between are drawn together.
+    WAVEFORM_FPS = 30
+
+    # Shared inference thread that batches windows from concurrent requests together.
+    USE_INFERENCE_WORKER = True
+    INFERENCE_WORKER_MAX_BATCH_SIZE = 16
+    INFERENCE_WORKER_MAX_WAIT_MS = 20
+
+    # Optional local inference server (python inference_server.py). When it is reachable the GUI
+    # and the batch CLI send audio to it instead of loading the models themselves.
+    USE_INFERENCE_SERVER = True
+    INFERENCE_SERVER_HOST = "127.0.0.1"
+    INFERENCE_SERVER_PORT = 8765
+    INFERENCE_SERVER_TIMEOUT_SECONDS = 0.2
+    INFERENCE_SERVER_RECHECK_SECONDS = 30
+    # Scoring requests give up after REQUEST_TIMEOUT_SECONDS, the server rejects audio above MAX_BODY_MB.
+    INFERENCE_SERVER_REQUEST_TIMEOUT_SECONDS = 30
+    INFERENCE_SERVER_MAX_BODY_MB = 512
+
+    # Per-window result cache keyed by the window samples, the detector and its checkpoint, so scoring
+    # the same recording again only runs the windows that changed. Set a path (e.g. "saved_model/result_cache.sqlite")
+    # to keep the cache between runs.
+    RESULT_CACHE_ENABLED = True
+    RESULT_CACHE_MAX_ENTRIES = 100000
+    RESULT_CACHE_PATH = None
+
+    # Model input: 16 kHz mono audio cut into 3 second windows.
+    SAMPLE_RATE = 16000
+    WINDOW_SECONDS = 3
+
+    # Hop between consecutive 3 second model windows. None keeps them back to back, a shorter hop
+    # (e.g. 1.5 or 1) overlaps them so disfluencies straddling a window boundary are seen whole.
+    WINDOW_HOP_SECONDS = None
+
+    # Delay after the last keystroke before the syllable count of the reading text is updated.
+    SYLLABLE_COUNT_DEBOUNCE_MS = 300
+
+    # Load the detectors from memory-mapped safetensors copies of the checkpoints (converted once,
+    # and again whenever a checkpoint changes) instead of unpickling them over freshly initialised weights.
+    FAST_CHECKPOINTS = True
+    FAST_CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_model", "safetensors")
+
+    # Quick check mode for slow machines. "truncate" runs only the first FAST_MODE_LAYERS encoder layers,
+    # "early_exit" lets a window stop at one of EARLY_EXIT_LAYERS once the probes fitted by
+    # calibrate_fast_mode.py are confident enough. None runs the full encoder.
+    FAST_MODE = None
+    FAST_MODE_LAYERS = 6
+    EARLY_EXIT_LAYERS = (4, 6, 8)
+    EARLY_EXIT_THRESHOLD = 0.9
+    PROBE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_model", "probes")
+
+    # Windows scored per step of a "Calculate metrics" job. The job can be cancelled and reports progress between steps.
+    INFERENCE_JOB_BATCH_WINDOWS = 16
+
+    # Windows per forward pass, so long recordings do not need the activations of every window at once.
+    # An int fixes the micro-batch size, "auto" fits it into MICRO_BATCH_MEMORY_FRACTION of the available RAM
+    # at about MICRO_BATCH_WINDOW_MB per 3 second window (capped at MICRO_BATCH_MAX_SIZE), None runs all windows together.
+    MICRO_BATCH_SIZE = "auto"
+    MICRO_BATCH_MAX_SIZE = 32
+    MICRO_BATCH_WINDOW_MB = 64
+    MICRO_BATCH_MEMORY_FRACTION = 0.25
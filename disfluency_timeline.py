@@ -0,0 +1,127 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from window_merge import count_events, get_event_runs
+
+EVENT_DTYPE = np.dtype([("model", np.uint8), ("start", np.float32), ("end", np.float32), ("confidence", np.float32)])
+MODEL_COLORS = {
+    "interjection": (255, 165, 0),
+    "prolongation": (30, 144, 255),
+    "repetition": (50, 205, 50),
+}
+
+
+class DisfluencyTimeline:
+    """
+    Per-window predictions and confidences of every detector for one recording.
+
+    `predictions` is a bool array and `confidences` a float16 array, both shaped
+    (n_windows, n_models) with columns in `model_types` order. `speech` marks the
+    windows that went through the models (the rest were skipped by the VAD gate).
+    Window i covers [i * hop_seconds, i * hop_seconds + window_seconds).
+    """
+
+    def __init__(self, model_types, predictions, confidences, speech, window_seconds=3, hop_seconds=None):
+        self.model_types = tuple(model_types)
+        self.predictions = predictions
+        self.confidences = confidences
+        self.speech = speech
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds or window_seconds
+
+    @classmethod
+    def from_results(cls, results, speech_mask=None, window_seconds=3, hop_seconds=None):
+        model_types = tuple(results)
+        predictions = np.stack([np.asarray(results[model_type][0]).reshape(-1) for model_type in model_types], axis=1)
+        confidences = np.stack([np.asarray(results[model_type][1]).reshape(-1) for model_type in model_types], axis=1)
+        speech = np.ones(len(predictions), dtype=bool) if speech_mask is None else np.asarray(speech_mask, dtype=bool)
+        return cls(model_types, predictions.astype(bool), confidences.astype(np.float16), speech, window_seconds, hop_seconds)
+
+    @classmethod
+    def concatenate(cls, timelines):
+        timelines = [timeline for timeline in timelines if timeline is not None]
+        return cls(
+            timelines[0].model_types,
+            np.concatenate([timeline.predictions for timeline in timelines]),
+            np.concatenate([timeline.confidences for timeline in timelines]),
+            np.concatenate([timeline.speech for timeline in timelines]),
+            timelines[0].window_seconds,
+            timelines[0].hop_seconds
+        )
+
+    def __len__(self):
+        return len(self.predictions)
+
+    def counts(self):
+        return dict(zip(self.model_types, count_events(self.predictions, self.window_seconds, self.hop_seconds).tolist()))
+
+    def events(self):
+        # Consecutive (or overlapping) positive windows of the same detector are merged into one event.
+        columns, starts, ends = get_event_runs(self.predictions)
+        cumulative = np.zeros((len(self.predictions) + 1, len(self.model_types)), dtype=np.float32)
+        np.cumsum(self.confidences, axis=0, dtype=np.float32, out=cumulative[1:])
+        events = np.empty(len(starts), dtype=EVENT_DTYPE)
+        events["model"] = columns
+        events["start"] = starts * self.hop_seconds
+        events["end"] = (ends - 1) * self.hop_seconds + self.window_seconds
+        events["confidence"] = (cumulative[ends, columns] - cumulative[starts, columns]) / (ends - starts)
+        return events[np.argsort(events["start"], kind="stable")]
+
+
+class _EventRegion(pg.LinearRegionItem):
+    def __init__(self, overlay, start, end, **kwargs):
+        super().__init__(values=(start, end), movable=False, **kwargs)
+        self.overlay = overlay
+        self.start = start
+        self.end = end
+
+    def mouseClickEvent(self, ev):
+        if ev.button() == Qt.LeftButton:
+            ev.accept()
+            self.overlay.segmentClicked.emit(self.start, self.end)
+
+
+class TimelineOverlay(QObject):
+    """
+    Draws a DisfluencyTimeline as colored regions over a waveform plot in session seconds,
+    one horizontal lane per detector. Region opacity follows the event confidence and
+    clicking a region emits `segmentClicked(start_seconds, end_seconds)`.
+    """
+    segmentClicked = pyqtSignal(float, float)
+
+    def __init__(self, plot_widget, parent=None):
+        super().__init__(parent)
+        self.plot_widget = plot_widget
+        self.regions = []
+        self.visible = False
+
+    def set_timeline(self, timeline, duration_seconds=None):
+        self.clear()
+        n_models = len(timeline.model_types)
+        for model, start, end, confidence in timeline.events():
+            model_type = timeline.model_types[model]
+            if duration_seconds is not None:
+                end = min(end, duration_seconds)
+            color = MODEL_COLORS.get(model_type, (128, 128, 128))
+            region = _EventRegion(
+                self,
+                float(start),
+                float(end),
+                brush=pg.mkBrush(*color, int(40 + 120 * confidence)),
+                pen=pg.mkPen(*color),
+                span=(model / n_models, (model + 1) / n_models)
+            )
+            region.setToolTip(f"{model_type} {start:.0f}-{end:.0f} s, confidence {confidence:.0%}")
+            region.setVisible(self.visible)
+            self.plot_widget.addItem(region)
+            self.regions.append(region)
+
+    def set_visible(self, visible):
+        self.visible = visible
+        for region in self.regions:
+            region.setVisible(visible)
+
+    def clear(self):
+        for region in self.regions:
+            self.plot_widget.removeItem(region)
+        self.regions = []
@@ -0,0 +1,68 @@
+import argparse
+import os
+import torch
+from config import Config
+
+
+def get_fast_checkpoint_path(checkpoint_path):
+    name = os.path.splitext(os.path.basename(checkpoint_path))[0]
+    return os.path.join(Config.FAST_CHECKPOINT_PATH, f"{name}.safetensors")
+
+
+def convert_checkpoint(checkpoint_path):
+    """
+    Writes the state dict of a pickled .pth/.ckpt checkpoint to a single safetensors file,
+    which can then be memory-mapped instead of unpickled.
+    """
+    from safetensors.torch import save_file
+
+    fast_path = get_fast_checkpoint_path(checkpoint_path)
+    state_dict = torch.load(checkpoint_path, map_location=torch.device("cpu"))["state_dict"]
+    # safetensors refuses tensors that share storage, each one gets its own contiguous copy.
+    state_dict = {key: value.detach().clone().contiguous() for key, value in state_dict.items()}
+    os.makedirs(os.path.dirname(fast_path), exist_ok=True)
+    save_file(state_dict, fast_path + ".tmp", metadata={"source": os.path.basename(checkpoint_path)})
+    os.replace(fast_path + ".tmp", fast_path)
+    return fast_path
+
+
+def load_checkpoint_state_dict(checkpoint_path):
+    """
+    Returns the checkpoint's state dict. With Config.FAST_CHECKPOINTS the tensors come from the
+    memory-mapped safetensors copy, which is (re)written first when missing or older than the checkpoint.
+    When the copy cannot be written (e.g. a read-only install) the checkpoint is unpickled as before.
+    """
+    if not Config.FAST_CHECKPOINTS:
+        return torch.load(checkpoint_path, map_location=torch.device("cpu"))["state_dict"]
+
+    from safetensors import SafetensorError
+    from safetensors.torch import load_file
+
+    fast_path = get_fast_checkpoint_path(checkpoint_path)
+    if not os.path.exists(fast_path) or os.path.getmtime(fast_path) < os.path.getmtime(checkpoint_path):
+        print(f"Converting {checkpoint_path} to {fast_path}")
+        try:
+            convert_checkpoint(checkpoint_path)
+        except (OSError, SafetensorError) as e:
+            # safetensors reports a read-only directory as a SafetensorError, not an OSError.
+            print(f"Could not write {fast_path}, loading the checkpoint directly: {e}")
+            try:
+                os.remove(fast_path + ".tmp")
+            except OSError:
+                pass  # Never created
+            return torch.load(checkpoint_path, map_location=torch.device("cpu"))["state_dict"]
+    return load_file(fast_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the detector checkpoints to memory-mappable safetensors files.")
+    parser.add_argument("--model-types", nargs="+", choices=list(Config.MODEL_FILES), default=list(Config.MODEL_FILES))
+    args = parser.parse_args()
+
+    for model_type in args.model_types:
+        checkpoint_path = os.path.join(Config.SAVED_CHECKPOINT_PATH, Config.MODEL_FILES[model_type])
+        print(f"{model_type}: {convert_checkpoint(checkpoint_path)}")
+
+
+if __name__ == "__main__":
+    main()
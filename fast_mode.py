@@ -0,0 +1,159 @@
+import os
+import torch
+import torch.nn as nn
+from config import Config
+
+FAST_MODES = (None, "truncate", "early_exit")
+
+
+def get_probe_path(model_type):
+    return os.path.join(Config.PROBE_PATH, f"{model_type}.pt")
+
+
+def save_probes(model_type, probes):
+    # probes: {layer: nn.Linear(classifier_proj_size, 1)}
+    os.makedirs(Config.PROBE_PATH, exist_ok=True)
+    torch.save({layer: probe.state_dict() for layer, probe in probes.items()}, get_probe_path(model_type))
+
+
+def load_probes(model_type, in_features):
+    if not os.path.exists(get_probe_path(model_type)):
+        return None
+    probes = {}
+    for layer, state_dict in torch.load(get_probe_path(model_type), map_location=torch.device("cpu")).items():
+        probes[layer] = nn.Linear(in_features, 1)
+        probes[layer].load_state_dict(state_dict)
+    return probes
+
+
+def truncate_encoder(wav2vec2, n_layers):
+    # The classification head then reads the hidden states of layer n_layers instead of the last one.
+    wav2vec2.encoder.layers = nn.ModuleList(list(wav2vec2.encoder.layers)[:n_layers])
+
+
+def _embed(wav2vec2, input_values):
+    hidden_states = wav2vec2.feature_extractor(input_values).transpose(1, 2)
+    hidden_states, _ = wav2vec2.feature_projection(hidden_states)
+    encoder = wav2vec2.encoder
+    hidden_states = hidden_states + encoder.pos_conv_embed(hidden_states)
+    if not wav2vec2.config.do_stable_layer_norm:
+        hidden_states = encoder.layer_norm(hidden_states)
+    return encoder.dropout(hidden_states)
+
+
+def _head_input(wav2vec2, hidden_states):
+    # The stable-layer-norm variants normalise after the last layer, the head expects that.
+    if wav2vec2.config.do_stable_layer_norm:
+        return wav2vec2.encoder.layer_norm(hidden_states)
+    return hidden_states
+
+
+def encode_layers(wav2vec2, input_values):
+    """
+    Runs the wav2vec2 encoder one layer at a time and yields (layer_index, hidden_states) after
+    each layer, starting at 1, in the form the classification head expects.
+    """
+    hidden_states = _embed(wav2vec2, input_values)
+    for index, layer in enumerate(wav2vec2.encoder.layers, 1):
+        hidden_states = layer(hidden_states)[0]
+        yield index, _head_input(wav2vec2, hidden_states)
+
+
+class EarlyExitModel(nn.Module):
+    """
+    Runs the encoder one layer at a time and lets each window leave as soon as the probes of every
+    detector are confident about it (probability above `threshold` or below 1 - threshold).
+    Windows that never get confident go through the remaining layers and the regular heads.
+
+    `heads` maps model types to modules with `projector` and `classifier`, `probes` maps model
+    types to {layer: nn.Linear} fitted on the mean-pooled projector output of that layer
+    (see calibrate_fast_mode.py). With a single head the logits tensor is returned, otherwise a dict.
+    """
+
+    def __init__(self, wav2vec2, heads, probes, threshold=0.9, exit_layers=None):
+        super(EarlyExitModel, self).__init__()
+        self.wav2vec2 = wav2vec2
+        self.heads = nn.ModuleDict(heads)
+        self.probes = nn.ModuleDict({
+            model_type: nn.ModuleDict({str(layer): probe for layer, probe in model_probes.items()})
+            for model_type, model_probes in probes.items()
+        })
+        self.threshold = threshold
+        self.exit_layers = set.intersection(*[set(model_probes) for model_probes in probes.values()])
+        if exit_layers is not None:
+            self.exit_layers &= set(exit_layers)
+        self.exit_counts = {}
+
+    def forward(self, input_data):
+        layers = self.wav2vec2.encoder.layers
+        logits = {model_type: torch.empty(input_data.shape[0], 1) for model_type in self.heads}
+        active = torch.arange(input_data.shape[0])
+        hidden_states = _embed(self.wav2vec2, input_data)
+        for index, layer in enumerate(layers, 1):
+            hidden_states = layer(hidden_states)[0]
+            if index == len(layers) or index not in self.exit_layers:
+                continue
+
+            features = _head_input(self.wav2vec2, hidden_states)
+            confident = torch.ones(len(active), dtype=torch.bool)
+            exit_logits = {}
+            for model_type, head in self.heads.items():
+                exit_logits[model_type] = self.probes[model_type][str(index)](head.projector(features).mean(dim=1))
+                probs = torch.sigmoid(exit_logits[model_type]).reshape(-1)
+                confident &= (probs >= self.threshold) | (probs <= 1 - self.threshold)
+            if not confident.any():
+                continue
+
+            for model_type in self.heads:
+                logits[model_type][active[confident]] = exit_logits[model_type][confident]
+            self.exit_counts[index] = self.exit_counts.get(index, 0) + int(confident.sum())
+            # Later layers only run for the windows that are still undecided.
+            active = active[~confident]
+            hidden_states = hidden_states[~confident]
+            if not len(active):
+                break
+
+        if len(active):
+            features = _head_input(self.wav2vec2, hidden_states)
+            for model_type, head in self.heads.items():
+                logits[model_type][active] = head.classifier(head.projector(features).mean(dim=1))
+            self.exit_counts[len(layers)] = self.exit_counts.get(len(layers), 0) + len(active)
+
+        if len(logits) == 1:
+            return next(iter(logits.values()))
+        return logits
+
+
+def apply_fast_mode(model, model_types):
+    """
+    Applies Config.FAST_MODE to a freshly loaded Wav2Vec2Model (one entry in `model_types`)
+    or shared MultiHeadWav2Vec2Model and returns the model to use.
+    """
+    if Config.FAST_MODE not in FAST_MODES:
+        raise ValueError(f"Unknown fast mode {Config.FAST_MODE!r}, expected one of {FAST_MODES}")
+    if Config.FAST_MODE is None:
+        return model
+
+    if hasattr(model, "heads"):
+        if not model.shared:
+            return model  # Runs the per-detector models, which get their own fast mode.
+        wav2vec2 = model.backbone.model.wav2vec2
+        heads = dict(model.heads)
+    else:
+        if model.model.config.use_weighted_layer_sum:
+            print("Fast mode needs the head to read the last layer only, using the full encoder")
+            return model
+        wav2vec2 = model.model.wav2vec2
+        heads = {model_types[0]: model.model}
+
+    if Config.FAST_MODE == "truncate":
+        truncate_encoder(wav2vec2, Config.FAST_MODE_LAYERS)
+        return model
+
+    probes = {}
+    for model_type, head in heads.items():
+        probes[model_type] = load_probes(model_type, head.classifier.in_features)
+        if probes[model_type] is None:
+            print(f"No early exit probes for {model_type}, run calibrate_fast_mode.py first. Using the full encoder.")
+            return model
+    return EarlyExitModel(wav2vec2, heads, probes, Config.EARLY_EXIT_THRESHOLD, Config.EARLY_EXIT_LAYERS).eval()
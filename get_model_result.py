@@ -1,20 +1,53 @@
 import os
+import sys
+import copy
+import hashlib
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from transformers import AutoModelForAudioClassification
 import numpy as np
 from config import Config
+from model_registry import ModelRegistry
+from voice_activity import get_speech_windows
+from model_precision import resolve_precision, get_precision_context, load_quantized_model
+from inference_worker import get_inference_worker
+from fast_checkpoint import load_checkpoint_state_dict
+from fast_mode import apply_fast_mode, get_probe_path
+from inference_client import score_audio_remote
+from result_cache import ResultCache, window_digest
+from window_merge import count_windows, get_hop_seconds
 
-def get_batched_data(recorded_audio, sample_rate=16000, chunk_duration_seconds=3):
-    waveform = np.frombuffer(b''.join(recorded_audio), dtype=np.float32)
-    waveform = torch.from_numpy(np.copy(waveform))
+def get_batched_data(recorded_audio, sample_rate=Config.SAMPLE_RATE, chunk_duration_seconds=Config.WINDOW_SECONDS, hop_seconds=None):
+    # Accepts either a list of raw float32 byte chunks or a float32 array (e.g. an AudioCaptureBuffer view).
+    # hop_seconds defaults to Config.WINDOW_HOP_SECONDS, None there means back to back windows.
+    # One tensor cannot mix a view and new memory, so a recording that does not end on a window boundary
+    # is copied once to pad it; get_window_parts avoids that copy.
+    waveform, chunk_size, hop_size = _get_waveform(recorded_audio, sample_rate, chunk_duration_seconds, hop_seconds)
+    n_windows = count_windows(waveform.shape[0], chunk_size, hop_size)
+    waveform = _pad_if_necessary(waveform, (n_windows - 1) * hop_size + chunk_size)
+    return waveform.unfold(0, chunk_size, hop_size)
+
+def get_window_parts(recorded_audio, sample_rate=Config.SAMPLE_RATE, chunk_duration_seconds=Config.WINDOW_SECONDS, hop_seconds=None):
+    """
+    The windows of get_batched_data as (full, tail): `full` is a strided view of every window that lies
+    inside the recording, `tail` holds the zero-padded last window(s) and may be empty.
+    """
+    waveform, chunk_size, hop_size = _get_waveform(recorded_audio, sample_rate, chunk_duration_seconds, hop_seconds)
+    n_windows = count_windows(waveform.shape[0], chunk_size, hop_size)
+    n_full = (waveform.shape[0] - chunk_size) // hop_size + 1 if waveform.shape[0] >= chunk_size else 0
+    full = waveform[:(n_full - 1) * hop_size + chunk_size].unfold(0, chunk_size, hop_size) if n_full else waveform.new_zeros((0, chunk_size))
+    tail = _pad_if_necessary(waveform[n_full * hop_size:], (n_windows - n_full - 1) * hop_size + chunk_size)
+    tail = tail.unfold(0, chunk_size, hop_size) if n_windows > n_full else waveform.new_zeros((0, chunk_size))
+    return full, tail
+
+def _get_waveform(recorded_audio, sample_rate, chunk_duration_seconds, hop_seconds):
+    if isinstance(recorded_audio, np.ndarray):
+        waveform = torch.from_numpy(recorded_audio)
+    else:
+        waveform = torch.from_numpy(np.frombuffer(b''.join(recorded_audio), dtype=np.float32).copy())
     chunk_size = int(sample_rate * chunk_duration_seconds)
-    chunks = torch.split(waveform, chunk_size, dim=0)
-    chunks = list(chunks)
-    if chunks[len(chunks)-1].shape[-1] != chunk_size:
-        chunks[len(chunks)-1] = _pad_if_necessary(chunks[len(chunks)-1], chunk_size)
-    return torch.stack(chunks)
+    hop_size = int(sample_rate * get_hop_seconds(hop_seconds, chunk_duration_seconds))
+    return waveform, chunk_size, hop_size
 
 def _pad_if_necessary(signal, num_samples):
     if signal.shape[0] < num_samples:
@@ -25,12 +58,19 @@ def _pad_if_necessary(signal, num_samples):
 class Wav2Vec2Model(nn.Module):
     def __init__(
             self,
-            config=Config
+            config=Config,
+            empty_weights=False
     ):
         super(Wav2Vec2Model, self).__init__()
         self.config = config
 
-        if os.path.exists(Config.SAVED_W2V2_PATH):
+        # Imported here so that the exported-graph backends never load transformers.
+        from transformers import AutoConfig, AutoModelForAudioClassification
+        if empty_weights and os.path.exists(Config.SAVED_W2V2_PATH):
+            # Only the module structure is built, on the meta device; the checkpoint tensors are assigned later.
+            with torch.device("meta"):
+                self.model = AutoModelForAudioClassification.from_config(AutoConfig.from_pretrained(Config.SAVED_W2V2_PATH))
+        elif os.path.exists(Config.SAVED_W2V2_PATH):
             self.model = AutoModelForAudioClassification.from_pretrained(Config.SAVED_W2V2_PATH)
         else:
             self.model = AutoModelForAudioClassification.from_pretrained("facebook/wav2vec2-base", num_labels=1)
@@ -44,26 +84,427 @@ class Wav2Vec2Model(nn.Module):
         return out
     
 def get_pretrained_model(saved_checkpoint_path):
-    model = Wav2Vec2Model(Config).to("cpu")
-    model.load_state_dict(torch.load(saved_checkpoint_path, map_location=torch.device("cpu"))["state_dict"])
+    if Config.FAST_CHECKPOINTS:
+        model = build_model_from_state_dict(load_checkpoint_state_dict(saved_checkpoint_path))
+    else:
+        model = Wav2Vec2Model(Config).to("cpu")
+        model.load_state_dict(torch.load(saved_checkpoint_path, map_location=torch.device("cpu"))["state_dict"])
     model.eval()
     return model
 
 
-def get_result(recorded_audio, model_type="prolongation"):
+def build_model_from_state_dict(state_dict):
+    # The weights are never initialised or copied: the state dict tensors become the parameters.
+    model = Wav2Vec2Model(Config, empty_weights=True)
+    model.load_state_dict(state_dict, assign=True)
+    for param in model.parameters():
+        param.requires_grad = False
+    if any(tensor.is_meta for tensor in list(model.parameters()) + list(model.buffers())):
+        raise RuntimeError("Checkpoint is missing weights for the wav2vec2 architecture")
+    return model
+
+
+def get_checkpoint_path(model_type):
+    return os.path.join(Config.SAVED_CHECKPOINT_PATH, Config.MODEL_FILES[model_type])
+
+
+ENCODER_PREFIX = "model.wav2vec2."
+MULTI_HEAD_KEY = "multi_head"
+
+
+class ClassificationHead(nn.Module):
+    # Mirrors the projector -> mean pooling -> classifier tail of Wav2Vec2ForSequenceClassification.
+    def __init__(self, projector, classifier):
+        super(ClassificationHead, self).__init__()
+        self.projector = projector
+        self.classifier = classifier
+
+    def forward(self, hidden_states):
+        pooled_output = self.projector(hidden_states).mean(dim=1)
+        return self.classifier(pooled_output)
+
+
+class MultiHeadWav2Vec2Model(nn.Module):
+    """
+    Runs the wav2vec2 encoder once and applies each detector's own classification head.
+
+    If the checkpoints were fine-tuned beyond the head (their encoder weights differ),
+    `shared` is False and forward falls back to the full per-detector models.
+    """
+
+    def __init__(self, model_types=tuple(Config.MODEL_FILES), config=Config, empty_weights=False):
+        super(MultiHeadWav2Vec2Model, self).__init__()
+        self.model_types = list(model_types)
+        self.backbone = None
+        self.heads = nn.ModuleDict()
+
+        if empty_weights:
+            # Shared structure only, on the meta device, for weights that are loaded afterwards.
+            state_dicts = {model_type: None for model_type in self.model_types}
+            self.shared = True
+        else:
+            state_dicts = {
+                model_type: load_checkpoint_state_dict(get_checkpoint_path(model_type))
+                for model_type in self.model_types
+            }
+            self.shared = _encoders_match(list(state_dicts.values()))
+        if not self.shared:
+            return
+
+        if empty_weights:
+            self.backbone = Wav2Vec2Model(config, empty_weights=True)
+        elif Config.FAST_CHECKPOINTS:
+            self.backbone = build_model_from_state_dict(state_dicts[self.model_types[0]])
+        else:
+            self.backbone = Wav2Vec2Model(config).to("cpu")
+            self.backbone.load_state_dict(state_dicts[self.model_types[0]])
+        if self.backbone.model.config.use_weighted_layer_sum:
+            self.shared = False
+            self.backbone = None
+            return
+
+        for model_type, state_dict in state_dicts.items():
+            head = ClassificationHead(
+                copy.deepcopy(self.backbone.model.projector),
+                copy.deepcopy(self.backbone.model.classifier)
+            )
+            if state_dict is not None:
+                head.load_state_dict(_extract_head_state_dict(state_dict))
+            self.heads[model_type] = head
+
+        # The backbone's own head is never used in shared mode.
+        self.backbone.model.projector = None
+        self.backbone.model.classifier = None
+        self.eval()
+
+    def forward(self, input_data):
+        if not self.shared:
+            return {model_type: MODEL_REGISTRY.get(model_type)(input_data) for model_type in self.model_types}
+        hidden_states = self.backbone.model.wav2vec2(input_data)[0]
+        return {model_type: head(hidden_states) for model_type, head in self.heads.items()}
+
+
+def _encoders_match(state_dicts):
+    reference = state_dicts[0]
+    for state_dict in state_dicts[1:]:
+        if set(state_dict) != set(reference):
+            return False
+        for key, value in reference.items():
+            if key.startswith(ENCODER_PREFIX) and not torch.equal(value, state_dict[key]):
+                return False
+    return True
+
+
+def _extract_head_state_dict(state_dict):
+    head_state_dict = {}
+    for key, value in state_dict.items():
+        for prefix in ("model.projector.", "model.classifier."):
+            if key.startswith(prefix):
+                head_state_dict[key[len("model."):]] = value
+    return head_state_dict
+
+
+def _build_model(key):
+    if key == MULTI_HEAD_KEY:
+        return MultiHeadWav2Vec2Model()
+    return get_pretrained_model(get_checkpoint_path(key))
+
+
+def _build_empty_model(key):
+    if key == MULTI_HEAD_KEY:
+        return MultiHeadWav2Vec2Model(empty_weights=True)
+    return Wav2Vec2Model(Config, empty_weights=True).eval()
+
+
+def _get_source_paths(key):
+    model_types = list(Config.MODEL_FILES) if key == MULTI_HEAD_KEY else [key]
+    return [get_checkpoint_path(model_type) for model_type in model_types]
+
+
+def load_model(key, precision=None, backend=None):
+    backend = backend or Config.INFERENCE_BACKEND
+    if backend != "pytorch":
+        from model_export import load_exported_model
+        return load_exported_model(key, backend)
+
+    precision = resolve_precision(precision or Config.INFERENCE_PRECISION)
+    if precision == "int8":
+        model = load_quantized_model(
+            lambda: _build_model(key),
+            os.path.join(Config.QUANTIZED_MODEL_PATH, f"{key}.int8.pt"),
+            source_paths=_get_source_paths(key),
+            build_empty_model=(lambda: _build_empty_model(key)) if os.path.exists(Config.SAVED_W2V2_PATH) else None
+        )
+    else:
+        model = _build_model(key)
+    model = apply_fast_mode(model, [key])
+    model.precision = precision
+    return model
+
+
+MODEL_REGISTRY = ModelRegistry(load_model, max_memory_mb=Config.MODEL_REGISTRY_MAX_MEMORY_MB)
+
+
+def get_intra_op_threads(n_models=1):
+    if Config.MODEL_INTRA_OP_THREADS:
+        return Config.MODEL_INTRA_OP_THREADS
+    return max(1, (os.cpu_count() or 1) // n_models)
+
 
-    if model_type == "prolongation":
-        MODEL_FILE = "prolongation.pth"
-    elif model_type == "interjection":
-        MODEL_FILE = "interjection.ckpt"
-    elif model_type == "repetition":
-        MODEL_FILE = "repetition.pth"
+_interop_threads_configured = False
 
 
-    batched_data = get_batched_data(recorded_audio)
-    model = get_pretrained_model(os.path.join(Config.SAVED_CHECKPOINT_PATH, MODEL_FILE))
-    logits = model(batched_data)
-    probs = torch.sigmoid(logits).squeeze()
+def configure_torch_threads(concurrent_models=1):
+    """
+    Sets the process-wide torch thread pools. torch.set_num_threads is global, so while
+    `concurrent_models` detectors run side by side each forward pass gets an even share of the cores.
+    The inter-op pool is only set the first time.
+    """
+    global _interop_threads_configured
+    torch.set_num_threads(get_intra_op_threads(concurrent_models))
+    if _interop_threads_configured:
+        return
+    _interop_threads_configured = True
+    if Config.MODEL_INTER_OP_THREADS:
+        try:
+            torch.set_num_interop_threads(Config.MODEL_INTER_OP_THREADS)
+        except RuntimeError:
+            pass  # Only possible before torch has run any inter-op parallel work.
+
+
+def get_available_memory_mb():
+    # Memory the OS can hand out without swapping, None when it cannot be determined.
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except ImportError:
+        pass
+
+    if sys.platform == "win32":
+        import ctypes
+
+        class MemoryStatusEx(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatusEx()
+        status.dwLength = ctypes.sizeof(MemoryStatusEx)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys / (1024 * 1024)
+        return None
+
+    try:
+        # MemAvailable also counts reclaimable page cache, unlike the free pages from sysconf.
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def get_micro_batch_size(batched_data):
+    """
+    Number of windows run through the model at once. With Config.MICRO_BATCH_SIZE = "auto" it is sized so
+    the activations of one micro-batch fit in Config.MICRO_BATCH_MEMORY_FRACTION of the available RAM.
+    """
+    if Config.MICRO_BATCH_SIZE is None:
+        return max(1, batched_data.shape[0])
+    if Config.MICRO_BATCH_SIZE != "auto":
+        return max(1, int(Config.MICRO_BATCH_SIZE))
+
+    available_mb = get_available_memory_mb()
+    if available_mb is None:
+        return Config.MICRO_BATCH_MAX_SIZE
+    # MICRO_BATCH_WINDOW_MB is measured for 3 second windows, activations grow with the window length.
+    window_mb = Config.MICRO_BATCH_WINDOW_MB * batched_data.shape[-1] / (Config.SAMPLE_RATE * Config.WINDOW_SECONDS)
+    size = int(available_mb * Config.MICRO_BATCH_MEMORY_FRACTION / window_mb)
+    return max(1, min(size, Config.MICRO_BATCH_MAX_SIZE))
+
+
+def run_model(model, batched_data):
+    # Long recordings are run a micro-batch at a time so the peak memory does not grow with the recording,
+    # only the logits of every micro-batch are kept.
+    micro_batch_size = get_micro_batch_size(batched_data)
+    all_logits = []
+    with torch.inference_mode(), get_precision_context(getattr(model, "precision", "fp32")):
+        for start in range(0, max(1, batched_data.shape[0]), micro_batch_size):
+            logits = model(batched_data[start:start + micro_batch_size])
+            if isinstance(logits, dict):
+                all_logits.append({model_type: value.float() for model_type, value in logits.items()})
+            else:
+                all_logits.append(logits.float())
+
+    if len(all_logits) == 1:
+        return all_logits[0]
+    if isinstance(all_logits[0], dict):
+        return {model_type: torch.cat([logits[model_type] for logits in all_logits]) for model_type in all_logits[0]}
+    return torch.cat(all_logits)
+
+
+def get_speech_mask(batched_data):
+    if not Config.VAD_ENABLED:
+        return torch.ones(batched_data.shape[0], dtype=torch.bool)
+    speech_windows = get_speech_windows(
+        batched_data.numpy(),
+        energy_threshold_db=Config.VAD_ENERGY_THRESHOLD_DB,
+        zcr_threshold=Config.VAD_ZCR_THRESHOLD,
+        min_speech_ratio=Config.VAD_MIN_SPEECH_RATIO
+    )
+    return torch.from_numpy(speech_windows)
+
+
+def _logits_to_result(logits, speech_mask):
+    # Windows skipped by the voice activity gate get probability 0, i.e. a confident "no disfluency".
+    probs = torch.zeros(speech_mask.shape[0])
+    if logits is not None:
+        probs[speech_mask] = torch.sigmoid(logits).reshape(-1)
+    return _probs_to_result(probs)
+
+
+def _probs_to_result(probs):
     prediction = torch.round(probs)
     confidence = torch.where((prediction == 1), probs, 1 - probs)
     return prediction, confidence
+
+
+def get_batch_result(batched_data, model_type="prolongation", speech_mask=None):
+    if speech_mask is None:
+        speech_mask = get_speech_mask(batched_data)
+    logits = None
+    if speech_mask.any():
+        model = MODEL_REGISTRY.get(model_type)
+        logits = run_model(model, batched_data[speech_mask])
+    return _logits_to_result(logits, speech_mask)
+
+
+def get_multi_head_batch_result(batched_data, speech_mask=None):
+    if speech_mask is None:
+        speech_mask = get_speech_mask(batched_data)
+    if not speech_mask.any():
+        return {model_type: _logits_to_result(None, speech_mask) for model_type in Config.MODEL_FILES}
+    model = MODEL_REGISTRY.get(MULTI_HEAD_KEY)
+    all_logits = run_model(model, batched_data[speech_mask])
+    return {model_type: _logits_to_result(logits, speech_mask) for model_type, logits in all_logits.items()}
+
+
+def get_all_batch_results(batched_data, speech_mask=None):
+    if Config.MULTI_HEAD_INFERENCE:
+        return get_multi_head_batch_result(batched_data, speech_mask)
+    return {model_type: get_batch_result(batched_data, model_type, speech_mask) for model_type in Config.MODEL_FILES}
+
+
+RESULT_CACHE = ResultCache(Config.RESULT_CACHE_MAX_ENTRIES, Config.RESULT_CACHE_PATH) if Config.RESULT_CACHE_ENABLED else None
+
+
+def get_model_version(model_type):
+    # Anything that can change a window's result: the model file, precision, backend, VAD gate and fast mode.
+    model_path = get_checkpoint_path(model_type)
+    if Config.INFERENCE_BACKEND != "pytorch":
+        # The exported graph is what runs, it can be re-exported without the checkpoint changing.
+        from model_export import get_exported_model_path
+        exported_path = get_exported_model_path(MULTI_HEAD_KEY if Config.MULTI_HEAD_INFERENCE else model_type, Config.INFERENCE_BACKEND)
+        if os.path.exists(exported_path):
+            model_path = exported_path
+    stat = os.stat(model_path)
+    version = [stat.st_mtime_ns, stat.st_size, resolve_precision(Config.INFERENCE_PRECISION), Config.INFERENCE_BACKEND]
+    if Config.VAD_ENABLED:
+        version += [Config.VAD_ENERGY_THRESHOLD_DB, Config.VAD_ZCR_THRESHOLD, Config.VAD_MIN_SPEECH_RATIO]
+    if Config.FAST_MODE == "truncate":
+        version += [Config.FAST_MODE, Config.FAST_MODE_LAYERS]
+    elif Config.FAST_MODE == "early_exit" and os.path.exists(get_probe_path(model_type)):
+        version += [Config.FAST_MODE, Config.EARLY_EXIT_THRESHOLD, Config.EARLY_EXIT_LAYERS, os.path.getmtime(get_probe_path(model_type))]
+    return hashlib.blake2b(repr(version).encode(), digest_size=8).hexdigest()
+
+
+def score_batch(batched_data, model_types=None):
+    """
+    Returns ({model_type: (prediction, confidence)}, speech_mask) for `model_types` (every detector by default),
+    batched with other callers when the worker is on.
+    """
+    model_types = tuple(model_types or Config.MODEL_FILES)
+    if RESULT_CACHE is not None:
+        return _score_batch_cached(batched_data, model_types)
+    return _score_batch(batched_data, model_types)
+
+
+def _score_batch_cached(batched_data, model_types):
+    # Only windows that were not scored before with the current checkpoints go through the models.
+    digests = [window_digest(window) for window in batched_data.numpy()]
+    versions = {model_type: get_model_version(model_type) for model_type in model_types}
+    keys = {
+        model_type: [f"{digest}:{model_type}:{versions[model_type]}" for digest in digests]
+        for model_type in model_types
+    }
+    cached = {model_type: RESULT_CACHE.get_many(model_keys) for model_type, model_keys in keys.items()}
+    missing = [index for index in range(len(digests)) if any(values[index] is None for values in cached.values())]
+
+    if missing:
+        to_score = batched_data if len(missing) == len(digests) else batched_data[torch.tensor(missing)]
+        results, speech_mask = _score_batch(to_score, model_types)
+        for model_type, (prediction, confidence) in results.items():
+            probs = torch.where(prediction == 1, confidence, 1 - confidence)
+            entries = {}
+            for position, index in enumerate(missing):
+                cached[model_type][index] = (float(probs[position]), bool(speech_mask[position]))
+                entries[keys[model_type][index]] = cached[model_type][index]
+            RESULT_CACHE.put_many(entries)
+
+    speech_mask = torch.tensor([value[1] for value in next(iter(cached.values()))], dtype=torch.bool)
+    results = {
+        model_type: _probs_to_result(torch.tensor([value[0] for value in values], dtype=torch.float32))
+        for model_type, values in cached.items()
+    }
+    return results, speech_mask
+
+
+def _score_batch(batched_data, model_types):
+    if not Config.MULTI_HEAD_INFERENCE and set(model_types) != set(Config.MODEL_FILES):
+        # Separate checkpoints, only the requested detectors need to run.
+        speech_mask = get_speech_mask(batched_data)
+        return {model_type: get_batch_result(batched_data, model_type, speech_mask) for model_type in model_types}, speech_mask
+
+    if Config.USE_INFERENCE_WORKER:
+        results, speech_mask = get_inference_worker().submit(batched_data).result()
+    else:
+        speech_mask = get_speech_mask(batched_data)
+        results = get_all_batch_results(batched_data, speech_mask)
+    return {model_type: results[model_type] for model_type in model_types}, speech_mask
+
+
+def score_windows(recorded_audio, hop_seconds=None, model_types=None):
+    """
+    score_batch over the windows of a recording without padding a copy of it: the full windows
+    are scored as a view and the padded tail separately.
+    """
+    parts = [part for part in get_window_parts(recorded_audio, hop_seconds=hop_seconds) if len(part)]
+    scored = [score_batch(part, model_types) for part in parts]
+    if len(scored) == 1:
+        return scored[0]
+    results = {
+        model_type: tuple(torch.cat(values) for values in zip(*(part_results[model_type] for part_results, _ in scored)))
+        for model_type in scored[0][0]
+    }
+    return results, torch.cat([speech_mask for _, speech_mask in scored])
+
+
+def get_result(recorded_audio, model_type="prolongation"):
+    remote = score_audio_remote(recorded_audio, model_types=(model_type,))
+    if remote is not None:
+        prediction, confidence = remote[0][model_type]
+        return torch.from_numpy(prediction), torch.from_numpy(confidence)
+    results, _ = score_windows(recorded_audio, model_types=(model_type,))
+    return results[model_type]
@@ -0,0 +1,78 @@
+import json
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+from config import Config
+
+_server_checked_at = None
+_server_available = False
+# The server is local (or on the LAN), requests must not go through an HTTP proxy.
+_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def get_server_url():
+    return f"http://{Config.INFERENCE_SERVER_HOST}:{Config.INFERENCE_SERVER_PORT}"
+
+
+def is_server_available():
+    # The health check is cached so a missing server costs one short timeout every few seconds at most.
+    global _server_checked_at, _server_available
+    if not Config.USE_INFERENCE_SERVER:
+        return False
+    now = time.monotonic()
+    if _server_checked_at is None or now - _server_checked_at > Config.INFERENCE_SERVER_RECHECK_SECONDS:
+        try:
+            with _opener.open(get_server_url() + "/health", timeout=Config.INFERENCE_SERVER_TIMEOUT_SECONDS):
+                _server_available = True
+        except (urllib.error.URLError, OSError):
+            _server_available = False
+        _server_checked_at = now
+    return _server_available
+
+
+def score_audio_remote(audio, hop_seconds=None, model_types=None):
+    """
+    Scores float32 16 kHz samples (an array or a list of raw byte chunks) on the inference server.
+    `hop_seconds` overrides the server's window hop and `model_types` limits scoring to those
+    detectors (all of them by default). Returns ({model_type: (prediction, confidence)}, speech_mask)
+    as NumPy arrays, or None when no server is reachable.
+    """
+    global _server_available
+    if not is_server_available():
+        return None
+    if not isinstance(audio, np.ndarray):
+        audio = np.frombuffer(b"".join(audio), dtype=np.float32)
+    headers = {"Content-Type": "application/octet-stream"}
+    if hop_seconds:
+        headers["X-Hop-Seconds"] = str(hop_seconds)
+    if model_types:
+        headers["X-Model-Types"] = ",".join(model_types)
+    request = urllib.request.Request(
+        get_server_url() + "/score",
+        data=np.ascontiguousarray(audio, dtype=np.float32).tobytes(),
+        headers=headers
+    )
+    try:
+        # A hung server must not block the inference threads, a cancelled job waits at most this long.
+        with _opener.open(request, timeout=Config.INFERENCE_SERVER_REQUEST_TIMEOUT_SECONDS) as response:
+            payload = json.loads(response.read())
+    except (urllib.error.URLError, OSError) as e:
+        print(f"Inference server request failed, falling back to local inference: {e}")
+        _server_available = False
+        return None
+
+    results = {
+        model_type: (np.array(result["prediction"], dtype=np.float32), np.array(result["confidence"], dtype=np.float32))
+        for model_type, result in payload["results"].items()
+    }
+    return results, np.array(payload["speech_mask"], dtype=bool)
+
+
+def score_audio(audio, hop_seconds=None, model_types=None):
+    # Uses the inference server when one is running, otherwise scores in this process.
+    remote = score_audio_remote(audio, hop_seconds, model_types)
+    if remote is not None:
+        return remote
+    from get_model_result import score_windows
+    return score_windows(audio, hop_seconds, model_types)
@@ -0,0 +1,81 @@
+import threading
+import time
+import numpy as np
+from config import Config
+from window_merge import count_windows, get_hop_seconds
+
+
+class InferenceCancelled(Exception):
+    pass
+
+
+class InferenceJob:
+    """
+    Scores a recording a batch of windows at a time, so it can be cancelled between batches
+    and report progress as (windows_done, windows_total, eta_seconds) through `on_progress`.
+
+    `score(segment)` returns ({model_type: (prediction, confidence)}, speech_mask or None) for a
+    float32 segment. Each segment covers exactly `batch_windows` windows of the full recording,
+    so the concatenated results are the same as scoring the recording in one go.
+    """
+
+    def __init__(self, audio, score=None, batch_windows=16, sample_rate=Config.SAMPLE_RATE, window_seconds=Config.WINDOW_SECONDS, hop_seconds=None, on_progress=None):
+        if not isinstance(audio, np.ndarray):
+            audio = np.frombuffer(b"".join(audio), dtype=np.float32)
+        self.audio = audio
+        self.score = score or self._score_audio
+        self.batch_windows = batch_windows
+        self.window_samples = int(sample_rate * window_seconds)
+        self.hop_samples = int(sample_rate * get_hop_seconds(hop_seconds, window_seconds))
+        self.on_progress = on_progress
+        self._cancelled = threading.Event()
+
+    @staticmethod
+    def _score_audio(segment):
+        from inference_client import score_audio
+        return score_audio(segment)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def n_windows(self):
+        # The count get_batched_data uses, so segments and progress match the windows actually scored.
+        return count_windows(len(self.audio), self.window_samples, self.hop_samples)
+
+    def run(self):
+        total = self.n_windows
+        predictions = {}
+        confidences = {}
+        speech_masks = []
+        start_time = time.perf_counter()
+        for first in range(0, total, self.batch_windows):
+            if self.cancelled:
+                raise InferenceCancelled()
+            begin = first * self.hop_samples
+            if first + self.batch_windows < total:
+                end = begin + (self.batch_windows - 1) * self.hop_samples + self.window_samples
+            else:
+                end = len(self.audio)
+            results, speech_mask = self.score(self.audio[begin:end])
+
+            for model_type, (prediction, confidence) in results.items():
+                predictions.setdefault(model_type, []).append(np.asarray(prediction).reshape(-1))
+                confidences.setdefault(model_type, []).append(np.asarray(confidence).reshape(-1))
+            n_scored = len(predictions[model_type][-1])
+            speech_masks.append(np.ones(n_scored, dtype=bool) if speech_mask is None else np.asarray(speech_mask, dtype=bool))
+
+            done = min(first + self.batch_windows, total)
+            if self.on_progress:
+                elapsed = time.perf_counter() - start_time
+                self.on_progress(done, total, elapsed / done * (total - done))
+
+        results = {
+            model_type: (np.concatenate(predictions[model_type]), np.concatenate(confidences[model_type]))
+            for model_type in predictions
+        }
+        return results, np.concatenate(speech_masks)
@@ -0,0 +1,97 @@
+import argparse
+import io
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from config import Config
+from audio_files import load_wav
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health  -> {"status": "ok", "models": [...]}
+    POST /score   -> body is raw float32 samples at 16 kHz (application/octet-stream)
+                     or a WAV file (audio/wav); replies with per-window predictions,
+                     confidences and the voice activity mask. An optional X-Hop-Seconds
+                     header overrides Config.WINDOW_HOP_SECONDS and X-Model-Types (comma
+                     separated) limits scoring to those detectors.
+    """
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404)
+            return
+        self._send_json({"status": "ok", "models": list(Config.MODEL_FILES)})
+
+    def do_POST(self):
+        from get_model_result import score_windows
+
+        if self.path != "/score":
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self.send_error(400, "Invalid Content-Length")
+            return
+        if length > Config.INFERENCE_SERVER_MAX_BODY_MB * 1024 * 1024:
+            self.send_error(413, f"Audio larger than {Config.INFERENCE_SERVER_MAX_BODY_MB} MB")
+            return
+        body = self.rfile.read(length)
+
+        try:
+            if self.headers.get("Content-Type", "").startswith("audio/"):
+                audio = load_wav(io.BytesIO(body))
+            else:
+                audio = np.frombuffer(body, dtype=np.float32).copy()
+            hop_seconds = float(self.headers["X-Hop-Seconds"]) if self.headers.get("X-Hop-Seconds") else None
+            model_types = self.headers["X-Model-Types"].split(",") if self.headers.get("X-Model-Types") else None
+            if model_types and not set(model_types) <= set(Config.MODEL_FILES):
+                raise ValueError(f"Unknown model types {model_types}")
+        except Exception as e:
+            self.send_error(400, str(e))
+            return
+
+        try:
+            results, speech_mask = score_windows(audio, hop_seconds, model_types)
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+
+        self._send_json({
+            "results": {
+                model_type: {"prediction": pred.reshape(-1).tolist(), "confidence": conf.reshape(-1).tolist()}
+                for model_type, (pred, conf) in results.items()
+            },
+            "speech_mask": speech_mask.tolist(),
+        })
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the disfluency detectors over HTTP.")
+    parser.add_argument("--host", default=Config.INFERENCE_SERVER_HOST, help="Use 0.0.0.0 to serve other workstations")
+    parser.add_argument("--port", type=int, default=Config.INFERENCE_SERVER_PORT)
+    args = parser.parse_args()
+
+    from get_model_result import MODEL_REGISTRY, MULTI_HEAD_KEY
+    print("Loading models...")
+    MODEL_REGISTRY.preload([MULTI_HEAD_KEY] if Config.MULTI_HEAD_INFERENCE else list(Config.MODEL_FILES), background=False)
+
+    server = ThreadingHTTPServer((args.host, args.port), InferenceRequestHandler)
+    print(f"Inference server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
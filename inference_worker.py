@@ -0,0 +1,92 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import torch
+from config import Config
+
+
+class DynamicBatchingWorker:
+    """
+    Long-lived inference thread shared by every caller in the process.
+
+    Callers submit a tensor of 3 second windows and get a Future back. The worker takes the
+    first pending request, keeps collecting windows from other pending requests until it has
+    `max_batch_size` windows or `max_wait_ms` has passed, runs them as one batch and hands
+    each caller its own slice of the results as `(results, speech_mask)`.
+    """
+
+    def __init__(self, max_batch_size=16, max_wait_ms=20):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self._carry = None
+        self.thread = threading.Thread(target=self._run, name="DynamicBatchingWorker", daemon=True)
+        self.thread.start()
+
+    def submit(self, batched_data):
+        future = Future()
+        self.requests.put((batched_data, future))
+        return future
+
+    def _collect(self):
+        # A request that would overflow the batch is carried over to start the next one.
+        batch = [self._carry or self.requests.get()]
+        self._carry = None
+        n_windows = batch[0][0].shape[0]
+        deadline = time.perf_counter() + self.max_wait
+        while n_windows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if n_windows + request[0].shape[0] > self.max_batch_size:
+                self._carry = request
+                break
+            batch.append(request)
+            n_windows += request[0].shape[0]
+        return batch
+
+    def _run(self):
+        from get_model_result import get_speech_mask, get_all_batch_results
+
+        while True:
+            batch = self._collect()
+            batch = [(data, future) for data, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                batched_data = torch.cat([data for data, future in batch]) if len(batch) > 1 else batch[0][0]
+                speech_mask = get_speech_mask(batched_data)
+                results = get_all_batch_results(batched_data, speech_mask)
+            except Exception as e:
+                for data, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for data, future in batch:
+                window_slice = slice(offset, offset + data.shape[0])
+                future.set_result((
+                    {model_type: (pred[window_slice], conf[window_slice]) for model_type, (pred, conf) in results.items()},
+                    speech_mask[window_slice]
+                ))
+                offset += data.shape[0]
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_inference_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = DynamicBatchingWorker(
+                max_batch_size=Config.INFERENCE_WORKER_MAX_BATCH_SIZE,
+                max_wait_ms=Config.INFERENCE_WORKER_MAX_WAIT_MS
+            )
+        return _worker
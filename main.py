@@ -1,5 +1,8 @@
-from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow, QHBoxLayout, QVBoxLayout,  QPushButton, QLabel, QStackedWidget, QTextEdit, QListWidget
-from PyQt5.QtCore import QObject, Qt, QThread, pyqtSignal, QMutex, QWaitCondition
+import time
+STARTUP_TIME = time.perf_counter()
+
+from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow, QHBoxLayout, QVBoxLayout,  QPushButton, QLabel, QStackedWidget, QTextEdit, QListWidget, QProgressBar
+from PyQt5.QtCore import QObject, Qt, QThread, QTimer, pyqtSignal, QMutex, QWaitCondition
 from PyQt5.QtGui import QPixmap, QIcon
 import pyqtgraph as pg
 import sys
@@ -8,19 +11,31 @@ import pyaudio
 import wave
 from datetime import datetime
 import numpy as np
-import torch
-
-import matplotlib
-matplotlib.use('Qt5Agg')
-from syllable_counter import find_syllable_count_from_sentences
-from get_model_result import get_result
+import queue
+import threading
+from collections import deque
+
+# torch, transformers and NLTK are imported lazily (see ModelLoadingThread) so the window shows up first.
+from syllable_counter import find_syllable_count_from_sentences, ParagraphSyllableCounter
+from audio_buffer import AudioCaptureBuffer, DiskAudioCaptureBuffer
+from audio_capture import CallbackAudioCapture
+from waveform_renderer import WaveformRenderer
+from spectrogram import SpectrogramRenderer
+from disfluency_timeline import DisfluencyTimeline, TimelineOverlay
+from window_merge import count_events, get_hop_seconds
+from inference_job import InferenceJob, InferenceCancelled
+from config import Config
 
 
 DURATION = 5  # In seconds
 CHUNK_SIZE = 1024
-SAMPLE_RATE = 16000
+SAMPLE_RATE = Config.SAMPLE_RATE
 SINGLE_SECOND_N_FRAMES = int(SAMPLE_RATE / CHUNK_SIZE)
 N_FRAMES = int(SINGLE_SECOND_N_FRAMES * DURATION)
+MODEL_WINDOW_SECONDS = Config.WINDOW_SECONDS
+MODEL_WINDOW_SAMPLES = SAMPLE_RATE * MODEL_WINDOW_SECONDS
+MODEL_HOP_SECONDS = get_hop_seconds()
+MODEL_HOP_SAMPLES = int(SAMPLE_RATE * MODEL_HOP_SECONDS)
 
 
 ##################################################################################################
@@ -60,6 +75,109 @@ class RecordingAudioThread(QThread):
     def stop(self):
         self.is_running = False
 
+class FrameWriterThread(QThread):
+    """
+    Drains its own reader of the frame queue and hands the samples to `consumer` off the GUI thread.
+    Blocks lost because the thread fell more than the queue length behind are replaced with silence,
+    so everything recorded after them keeps its place in the session timeline.
+    """
+
+    def __init__(self, reader, consumer, block_size, interval_ms, parent=None) -> None:
+        super().__init__(parent)
+        self.reader = reader
+        self.consumer = consumer
+        self.block_size = block_size
+        self.interval_ms = interval_ms
+        self.is_running = False
+
+    def run(self):
+        while self.is_running:
+            self.drain()
+            self.msleep(self.interval_ms)
+        self.drain()
+
+    def stop(self):
+        self.is_running = False
+
+    def drain(self):
+        missed_before = self.reader.missed_blocks
+        blocks = self.reader.read()
+        missed = self.reader.missed_blocks - missed_before
+        if not blocks and not missed:
+            return
+        chunks = [np.zeros(missed * self.block_size, dtype=np.float32)] if missed else []
+        self.consumer(np.concatenate(chunks + [samples for timestamp, samples in blocks]))
+
+
+class CallbackRecordingAudio(QObject):
+    """
+    Drop-in replacement for RecordingAudioThread built on PortAudio's callback mode.
+
+    Capture runs on PortAudio's own thread and never waits for the GUI. A FrameWriterThread
+    drains the frame queue at its own rate into `consumer` (capture buffer, disk file and
+    streaming inference). The GUI reads the queue on a QTimer tick only to measure the
+    capture-to-display latency and to report lost blocks through `blocksDropped(total)`.
+    stop() reports the session's figures through `statsReady(stats)`.
+    """
+    blocksDropped = pyqtSignal(int)
+    statsReady = pyqtSignal(dict)
+
+    def __init__(self, consumer, parent=None) -> None:
+        super().__init__(parent)
+        self.capture = CallbackAudioCapture(
+            sample_rate=SAMPLE_RATE,
+            chunk_size=CHUNK_SIZE,
+            queue_seconds=Config.CAPTURE_QUEUE_SECONDS
+        )
+        self.writer = FrameWriterThread(
+            self.capture.frames.reader(), consumer, CHUNK_SIZE, Config.CAPTURE_DRAIN_INTERVAL_MS
+        )
+        self.reader = self.capture.frames.reader()
+        self.reported_missed_blocks = 0
+        self.latencies_ms = deque(maxlen=500)
+        self.timer = QTimer(self)
+        self.timer.setInterval(Config.CAPTURE_DRAIN_INTERVAL_MS)
+        self.timer.timeout.connect(self.drain)
+
+    def start(self):
+        self.capture.start()
+        self.writer.is_running = True
+        self.writer.start()
+        self.timer.start()
+
+    def stop(self):
+        self.capture.stop()
+        self.timer.stop()
+        self.writer.stop()
+        self.writer.wait()
+        self.drain()
+        self.statsReady.emit(self.stats())
+
+    def isRunning(self):
+        return self.capture.is_running()
+
+    def wait(self):
+        pass  # stop() is synchronous and the writer has already stored every captured block.
+
+    def drain(self):
+        blocks = self.reader.read()
+        if blocks:
+            # This is the capture-to-display latency of the newest block.
+            self.latencies_ms.append((time.perf_counter() - blocks[-1][0]) * 1000)
+        if self.writer.reader.missed_blocks != self.reported_missed_blocks:
+            self.reported_missed_blocks = self.writer.reader.missed_blocks
+            self.blocksDropped.emit(self.reported_missed_blocks)
+
+    def stats(self):
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            "input_overflows": self.capture.input_overflows,
+            "missed_blocks": self.writer.reader.missed_blocks,
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)), 1),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        }
+
+
 class PlayingAudioThread(QThread):
     def __init__(self, parent=None, bytes_audio=b"") -> None:
         super().__init__(parent)
@@ -79,7 +197,10 @@ class PlayingAudioThread(QThread):
         )
 
         try:
-            self.stream.write(self.bytes_audio)
+            # Written chunk by chunk so only one small block is ever copied out of the capture buffer.
+            audio = np.frombuffer(self.bytes_audio, dtype=np.float32)
+            for start in range(0, len(audio), CHUNK_SIZE):
+                self.stream.write(audio[start:start + CHUNK_SIZE].tobytes())
         except Exception as e:
             print(f"Error during audio playback: {e}")
         finally:
@@ -97,7 +218,7 @@ class SavingAudioThread(QThread):
 
     def run(self):
         if not os.path.exists(self.save_dir):
-            os.mkdir(save_path)
+            os.makedirs(self.save_dir)
         save_path = os.path.join(self.save_dir, datetime.now().strftime("%H-%M_%d-%m-%Y") + ".wav")
         audio_data = (np.frombuffer(self.bytes_audio, dtype=np.float32) * 32767).astype(np.int16)
         with wave.open(save_path, "wb") as wf:
@@ -109,37 +230,325 @@ class SavingAudioThread(QThread):
 
 class RunModelThread(QThread):
     resultReady = pyqtSignal(int)
+    progressChanged = pyqtSignal(int, int, float)
+    failed = pyqtSignal(str)
 
-    def __init__(self, parent=None, bytes_audio=[], model_type="prolongation") -> None:
+    def __init__(self, parent=None, audio=None, model_type="prolongation") -> None:
         super().__init__(parent)
         self.model_type = model_type
-        self.bytes_audio = bytes_audio
+        self.audio = audio
         self.mutex = QMutex()
         self.condition = QWaitCondition()
+        self.result = None
+        self.speech_mask = None
+        self.scored_locally = False
+        self.error = None
+        self.job = InferenceJob(
+            audio,
+            score=self._score,
+            batch_windows=Config.INFERENCE_JOB_BATCH_WINDOWS,
+            window_seconds=MODEL_WINDOW_SECONDS,
+            on_progress=self.progressChanged.emit
+        )
+
+    def _score(self, segment):
+        from inference_client import score_audio
+        return score_audio(segment, model_types=(self.model_type,))
+
+    def cancel(self):
+        self.job.cancel()
 
     def run(self):
-        pred, conf = get_result(self.bytes_audio, model_type=self.model_type)
-        self.result = int(torch.sum(pred).item())
+        from inference_client import is_server_available
+
+        try:
+            self.scored_locally = not is_server_available()
+            if self.scored_locally:
+                from get_model_result import configure_torch_threads
+                # The detectors run side by side, each one gets a share of the cores until they are done.
+                configure_torch_threads(concurrent_models=len(Config.MODEL_FILES))
+            results, self.speech_mask = self.job.run()
+        except InferenceCancelled:
+            return
+        except Exception as e:
+            self.error = f"{self.model_type}: {e}"
+            self.failed.emit(self.error)
+            return
+        if self.job.cancelled:
+            return
+        self.prediction, self.confidence = results[self.model_type]
+        self.result = int(count_events(self.prediction, MODEL_WINDOW_SECONDS, MODEL_HOP_SECONDS)[0])
         self.resultReady.emit(self.result)
 
 
 class StutterCountThread(QThread):
     aggregatedResultReady = pyqtSignal(int)
+    skippedWindowsReady = pyqtSignal(int)
+    timelineReady = pyqtSignal(object)
+    progressChanged = pyqtSignal(int, int, float)
+    failed = pyqtSignal(str)
 
     def __init__(self, modelThreads):
         super().__init__()
         self.modelThreads = modelThreads
+        self.progress = {}
+        for modelThread in self.modelThreads:
+            modelThread.progressChanged.connect(
+                lambda done, total, eta, model_type=modelThread.model_type: self.update_progress(model_type, done, total, eta)
+            )
+            # The other detectors' results are useless without this one's.
+            modelThread.failed.connect(lambda error: self.cancel())
+
+    def update_progress(self, model_type, done, total, eta):
+        # Every detector scores the same windows side by side, the job is done when the slowest one is.
+        self.progress[model_type] = (done, eta)
+        self.progressChanged.emit(
+            sum(progress[0] for progress in self.progress.values()),
+            total * len(self.modelThreads),
+            max(progress[1] for progress in self.progress.values())
+        )
+
+    def cancel(self):
+        for modelThread in self.modelThreads:
+            modelThread.cancel()
 
     def run(self):
-        aggregatedResult = 0
+        # All detectors run at once, each one emits its own result as soon as it finishes.
         for modelThread in self.modelThreads:
             modelThread.start()
+
+        for modelThread in self.modelThreads:
             modelThread.wait()
+        if any(modelThread.scored_locally for modelThread in self.modelThreads):
+            from get_model_result import configure_torch_threads
+            configure_torch_threads()  # Streaming and the worker run one model at a time again.
+
+        errors = [modelThread.error for modelThread in self.modelThreads if modelThread.error]
+        if errors:
+            self.failed.emit("; ".join(errors))
+            return
+
+        aggregatedResult = 0
+        for modelThread in self.modelThreads:
+            if modelThread.result is None:
+                return  # Cancelled
             aggregatedResult += modelThread.result
-            
+
+        self.aggregatedResultReady.emit(aggregatedResult)
+        # Every detector sees the same windows, so they all skip the same ones.
+        speech_mask = self.modelThreads[0].speech_mask
+        self.skippedWindowsReady.emit(int((~speech_mask).sum()))
+        self.timelineReady.emit(DisfluencyTimeline.from_results(
+            {modelThread.model_type: (modelThread.prediction, modelThread.confidence) for modelThread in self.modelThreads},
+            speech_mask,
+            window_seconds=MODEL_WINDOW_SECONDS,
+            hop_seconds=MODEL_HOP_SECONDS
+        ))
+
+
+class InferenceJobThread(QThread):
+    """Scores a whole recording with every detector, cancellable between batches of windows."""
+    resultReady = pyqtSignal(str, int)
+    aggregatedResultReady = pyqtSignal(int)
+    skippedWindowsReady = pyqtSignal(int)
+    timelineReady = pyqtSignal(object)
+    progressChanged = pyqtSignal(int, int, float)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None, audio=None) -> None:
+        super().__init__(parent)
+        self.audio = audio
+        self.job = InferenceJob(
+            audio,
+            batch_windows=Config.INFERENCE_JOB_BATCH_WINDOWS,
+            window_seconds=MODEL_WINDOW_SECONDS,
+            on_progress=self.progressChanged.emit
+        )
+
+    def cancel(self):
+        self.job.cancel()
+
+    def run(self):
+        try:
+            results, speech_mask = self.job.run()
+        except InferenceCancelled:
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if self.job.cancelled:
+            return  # Cancelled while the last batch was running
+        timeline = DisfluencyTimeline.from_results(results, speech_mask, MODEL_WINDOW_SECONDS, MODEL_HOP_SECONDS)
+        aggregatedResult = 0
+        for model_type, result in timeline.counts().items():
+            aggregatedResult += result
+            self.resultReady.emit(model_type, result)
         self.aggregatedResultReady.emit(aggregatedResult)
+        self.skippedWindowsReady.emit(int((~speech_mask).sum().item()))
+        self.timelineReady.emit(timeline)
 
 
+class StreamingInferenceThread(QThread):
+    countsUpdated = pyqtSignal(dict)
+    finalResultReady = pyqtSignal(dict)
+    skippedWindowsReady = pyqtSignal(int)
+    timelineReady = pyqtSignal(object)
+    progressChanged = pyqtSignal(int, int, float)
+    # The session's timeline has a gap from the failed batch on, the recording has to be scored as a whole.
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.requests = queue.Queue()
+        self.counts = {model_type: 0 for model_type in Config.MODEL_FILES}
+        self.skipped_windows = 0
+        self.timelines = []
+        self.job = None
+        self.finish_progress = None
+        self._cancelled = threading.Event()
+
+    def add_window(self, window):
+        self.requests.put(("window", window))
+
+    def finish(self, tail=None):
+        # The tail is scored for the final result only, recording may still resume afterwards.
+        self.requests.put(("finish", tail))
+
+    def cancel(self):
+        # Pending windows are dropped, the batch being scored is the last one.
+        self._cancelled.set()
+        job = self.job
+        if job is not None:
+            job.cancel()
+        self.requests.put(("stop", None))
+
+    def run(self):
+        try:
+            self._run()
+        except InferenceCancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _run(self):
+        while not self._cancelled.is_set():
+            requests = [self.requests.get()]
+            while not self.requests.empty():
+                requests.append(self.requests.get_nowait())
+
+            kinds = [kind for kind, _ in requests]
+            if "finish" in kinds:
+                # Everything queued up to the last finish is scored before its result, that part is reported as progress.
+                last_finish = len(kinds) - 1 - kinds[::-1].index("finish")
+                total = 0
+                for kind, payload in requests[:last_finish + 1]:
+                    if kind == "window":
+                        total += 1
+                    elif kind == "finish" and payload is not None and len(payload):
+                        total += self._make_job(payload).n_windows
+                self.finish_progress = {"done": 0, "total": total, "start": time.perf_counter()}
+
+            # Consecutive complete windows are scored together in a single batch.
+            windows = []
+            for kind, payload in requests + [("flush", None)]:
+                if kind == "window":
+                    windows.append(payload)
+                    continue
+                if windows:
+                    # Counts are recomputed over the whole session so overlapping windows merge across batches.
+                    timeline = self._score(windows)
+                    self.skipped_windows += int((~timeline.speech).sum())
+                    self.timelines.append(timeline)
+                    self.counts = DisfluencyTimeline.concatenate(self.timelines).counts()
+                    self.countsUpdated.emit(dict(self.counts))
+                    windows = []
+
+                if kind == "finish":
+                    final_counts = dict(self.counts)
+                    final_skipped_windows = self.skipped_windows
+                    final_timelines = list(self.timelines)
+                    if payload is not None and len(payload):
+                        timeline = self._score(payload)
+                        final_skipped_windows += int((~timeline.speech).sum())
+                        final_timelines.append(timeline)
+                    if final_timelines:
+                        final_timeline = DisfluencyTimeline.concatenate(final_timelines)
+                        final_counts = final_timeline.counts()
+                    self.finalResultReady.emit(final_counts)
+                    self.skippedWindowsReady.emit(final_skipped_windows)
+                    if final_timelines:
+                        self.timelineReady.emit(final_timeline)
+                    if self.finish_progress and self.finish_progress["done"] >= self.finish_progress["total"]:
+                        self.finish_progress = None
+                elif kind == "stop":
+                    return
+
+    def _make_job(self, windows):
+        if isinstance(windows, list):
+            # The queued windows may overlap, laid end to end they split back into the same windows.
+            audio, hop_seconds = np.concatenate(windows), MODEL_WINDOW_SECONDS
+        else:
+            audio, hop_seconds = windows, MODEL_HOP_SECONDS
+        return InferenceJob(
+            audio,
+            score=lambda segment: self._score_segment(segment, hop_seconds),
+            batch_windows=Config.INFERENCE_JOB_BATCH_WINDOWS,
+            window_seconds=MODEL_WINDOW_SECONDS,
+            hop_seconds=hop_seconds,
+            on_progress=self._job_progress
+        )
+
+    @staticmethod
+    def _score_segment(segment, hop_seconds):
+        from inference_client import score_audio
+        return score_audio(segment, hop_seconds=hop_seconds)
+
+    def _job_progress(self, done, total, eta):
+        if self.finish_progress is None:
+            return
+        done += self.finish_progress["done"]
+        elapsed = time.perf_counter() - self.finish_progress["start"]
+        self.progressChanged.emit(done, self.finish_progress["total"], elapsed / done * (self.finish_progress["total"] - done))
+
+    def _score(self, windows):
+        # Scored a batch of windows at a time, cancel() stops the job between batches.
+        self.job = self._make_job(windows)
+        if self._cancelled.is_set():
+            raise InferenceCancelled()
+        results, speech_mask = self.job.run()
+        if self.finish_progress is not None:
+            self.finish_progress["done"] += self.job.n_windows
+        self.job = None
+        return DisfluencyTimeline.from_results(results, speech_mask, MODEL_WINDOW_SECONDS, MODEL_HOP_SECONDS)
+
+
+class ModelLoadingThread(QThread):
+    modelsReady = pyqtSignal(float)
+    modelsFailed = pyqtSignal(str)
+
+    def run(self):
+        from inference_client import is_server_available
+
+        if is_server_available():
+            # The server holds the models, this process never needs to import torch.
+            find_syllable_count_from_sentences("warm up")
+            self.modelsReady.emit(time.perf_counter() - STARTUP_TIME)
+            return
+        try:
+            from get_model_result import MODEL_REGISTRY, MULTI_HEAD_KEY, configure_torch_threads
+            configure_torch_threads()
+            find_syllable_count_from_sentences("warm up")
+
+            if Config.PRELOAD_MODELS:
+                MODEL_REGISTRY.preload(
+                    [MULTI_HEAD_KEY] if Config.MULTI_HEAD_INFERENCE else list(Config.MODEL_FILES),
+                    background=False
+                )
+        except Exception as e:
+            self.modelsFailed.emit(str(e))
+            return
+        self.modelsReady.emit(time.perf_counter() - STARTUP_TIME)
+
 
 ##################################################################################################
 ##################################################################################################
@@ -181,6 +590,11 @@ class BetterSpeakApp(QMainWindow):
         self.page2_button.clicked.connect(self.show_page2)
         self.options_layout.addWidget(self.page2_button)
 
+        self.models_ready = False
+        self.options_status = QLabel("Loading models...")
+        self.options_status.setObjectName("options_status")
+        self.options_layout.addWidget(self.options_status, alignment=Qt.AlignHCenter | Qt.AlignBottom)
+
         self.master_layout.addWidget(self.options, stretch=15)
 
         self.stacked_widgets = QStackedWidget()
@@ -190,6 +604,36 @@ class BetterSpeakApp(QMainWindow):
 
         self.showMaximized()
 
+        self.startup_timings = {}
+        QTimer.singleShot(0, self.on_window_shown)
+        self.model_loading_thread = ModelLoadingThread()
+        self.model_loading_thread.modelsReady.connect(self.on_models_ready)
+        self.model_loading_thread.modelsFailed.connect(self.on_models_failed)
+
+    def on_window_shown(self):
+        # Heavy imports and model weights only start loading once the window is on screen.
+        self.startup_timings["time_to_window"] = time.perf_counter() - STARTUP_TIME
+        self.model_loading_thread.start()
+
+    def on_models_ready(self, seconds):
+        self.startup_timings["time_to_models_ready"] = seconds
+        self.models_ready = True
+        self.page1_row3_pss_button.setEnabled(True)
+        self.options_status.setText("Models ready")
+        print(
+            f"Startup: window shown after {self.startup_timings['time_to_window']:.2f} s, "
+            f"models ready after {seconds:.2f} s"
+        )
+
+    def on_models_failed(self, error):
+        # Scoring retries the load, a repeated failure is reported through the scoring threads' failed signal.
+        self.models_ready = True
+        self.page1_row3_pss_button.setEnabled(True)
+        self.options_status.setText("Models failed to load")
+        self.options_status.setToolTip(error)
+        self.page1_row3_result_part.setText(f"Models failed to load: {error}\n")
+        print(f"Error while loading models: {error}")
+
 
 
     def create_page1(self):
@@ -214,9 +658,24 @@ class BetterSpeakApp(QMainWindow):
         self.page1_row3_right_part = QWidget()
         self.page1_row3_right_part.setObjectName("page1_row3_right_part")
         self.page1_row3_right_part_layout = QVBoxLayout(self.page1_row3_right_part)
+        self.page1_row3_syllable_part = QLabel("")
+        self.page1_row3_syllable_part.setObjectName("page1_row3_syllable_part")
+        self.page1_row3_right_part_layout.addWidget(self.page1_row3_syllable_part)
         self.page1_row3_result_part = QLabel("This is where we are supposed to show results")
         self.page1_row3_result_part.setObjectName("page1_row3_result_part")
         self.page1_row3_right_part_layout.addWidget(self.page1_row3_result_part)
+        self.page1_row3_progress_part = QProgressBar()
+        self.page1_row3_progress_part.setObjectName("page1_row3_progress_part")
+        self.page1_row3_progress_part.hide()
+        self.page1_row3_right_part_layout.addWidget(self.page1_row3_progress_part)
+        self.page1_row3_capture_warning_part = QLabel("")
+        self.page1_row3_capture_warning_part.setObjectName("page1_row3_capture_warning_part")
+        self.page1_row3_capture_warning_part.hide()
+        self.page1_row3_right_part_layout.addWidget(self.page1_row3_capture_warning_part)
+        self.page1_row3_capture_stats_part = QLabel("")
+        self.page1_row3_capture_stats_part.setObjectName("page1_row3_capture_stats_part")
+        self.page1_row3_capture_stats_part.hide()
+        self.page1_row3_right_part_layout.addWidget(self.page1_row3_capture_stats_part)
 
 
         self.page1_row3.addWidget(self.page1_row3_text_part, stretch=80)
@@ -237,6 +696,19 @@ class BetterSpeakApp(QMainWindow):
         self.page1_row4_wavegraph.setYRange(-1.1, 1.1)
         self.page1_row4_wavegraph.hideAxis('bottom')
         self.pen = pg.mkPen(color=(255, 0, 0))
+        self.timeline_overlay = TimelineOverlay(self.page1_row4_wavegraph, parent=self.page1_row4_wavegraph)
+        self.timeline_overlay.segmentClicked.connect(self.play_segment)
+
+        self.page1_row4_spectrogram = pg.PlotWidget()
+        self.page1_row4_spectrogram.setObjectName("page1_row4_spectrogram")
+        self.page1_row4_spectrogram.setBackground("w")
+        self.page1_row4_spectrogram.setTitle("Log-mel spectrogram", color="gray", size="10pt")
+        self.page1_row4_spectrogram.setLabel("left", "Mel band")
+        self.page1_row4_spectrogram.hideAxis('bottom')
+        self.spectrogram_image = pg.ImageItem()
+        self.spectrogram_image.setColorMap(pg.colormap.get("viridis"))
+        self.page1_row4_spectrogram.addItem(self.spectrogram_image)
+        self.page1_row4_spectrogram.hide()
 
         self.main_buttons()
         self.graph_buttons()
@@ -244,6 +716,7 @@ class BetterSpeakApp(QMainWindow):
 
 
         self.page1_row4_layout.addWidget(self.page1_row4_wavegraph, stretch=80)
+        self.page1_row4_layout.addWidget(self.page1_row4_spectrogram, stretch=80)
         self.page1_row4_layout.addWidget(self.page1_row4_buttons, stretch=20)
         self.page1_layout.addWidget(self.page1_row4, stretch=30)
 
@@ -253,6 +726,14 @@ class BetterSpeakApp(QMainWindow):
 
         # Events
 
+        # The syllable count follows the text as it is typed, recounted once typing pauses.
+        self.syllable_counter = ParagraphSyllableCounter()
+        self.syllable_count_timer = QTimer(self.page1)
+        self.syllable_count_timer.setSingleShot(True)
+        self.syllable_count_timer.setInterval(Config.SYLLABLE_COUNT_DEBOUNCE_MS)
+        self.syllable_count_timer.timeout.connect(self.update_syllable_count)
+        self.page1_row3_text_part.textChanged.connect(self.syllable_count_timer.start)
+
         self.page1_row3_start_button.clicked.connect(self.start_recording)
         self.page1_row3_pause_button.clicked.connect(self.pause_recording)
         self.page1_row3_pss_button.clicked.connect(self.pss_calculation)
@@ -270,6 +751,7 @@ class BetterSpeakApp(QMainWindow):
         self.page1_row3_pause_button.setObjectName("page1_row3_pause_button")
         self.page1_row3_pss_button = QPushButton("Calculate metrics")
         self.page1_row3_pss_button.setObjectName("page1_row3_pss_button")
+        self.page1_row3_pss_button.setEnabled(getattr(self, "models_ready", False))
         self.page1_row3_play_button = QPushButton("Play recording")
         self.page1_row3_play_button.setObjectName("page1_row3_play_button")
         self.page1_row3_save_button = QPushButton("Save recording")
@@ -300,54 +782,254 @@ class BetterSpeakApp(QMainWindow):
         self.page1_row4_buttons = QWidget()
         self.page1_row4_buttons.setObjectName("page1_row4_buttons")
         self.page1_row4_buttons_layout = QVBoxLayout(self.page1_row4_buttons)
-        self.page1_row4_graph_button_part = QPushButton("")
+        self.page1_row4_graph_button_part = QPushButton("Show full session")
+        self.page1_row4_graph_button_part.setObjectName("page1_row4_graph_button_part")
+        self.page1_row4_graph_button_part.setCheckable(True)
+        self.page1_row4_graph_button_part.setCursor(Qt.PointingHandCursor)
+        self.page1_row4_graph_button_part.toggled.connect(self.toggle_waveform_overview)
         self.page1_row4_buttons_layout.addWidget(self.page1_row4_graph_button_part)
+        self.page1_row4_spectrogram_button = QPushButton("Show spectrogram")
+        self.page1_row4_spectrogram_button.setObjectName("page1_row4_spectrogram_button")
+        self.page1_row4_spectrogram_button.setCheckable(True)
+        self.page1_row4_spectrogram_button.setCursor(Qt.PointingHandCursor)
+        self.page1_row4_spectrogram_button.toggled.connect(self.toggle_spectrogram)
+        self.page1_row4_buttons_layout.addWidget(self.page1_row4_spectrogram_button)
+
+    def toggle_spectrogram(self, checked):
+        self.page1_row4_wavegraph.setVisible(not checked)
+        self.page1_row4_graph_button_part.setEnabled(not checked)
+        self.page1_row4_spectrogram.setVisible(checked)
+        self.spectrogram_renderer.set_enabled(checked)
+        self.page1_row4_spectrogram_button.setText("Show waveform" if checked else "Show spectrogram")
+
+    def toggle_waveform_overview(self, checked):
+        self.waveform_renderer.set_overview(checked)
+        # Event regions are in session seconds, so they only line up with the full session view.
+        self.timeline_overlay.set_visible(checked)
+        self.page1_row4_graph_button_part.setText("Show live waveform" if checked else "Show full session")
 
 
     def record_audio(self):
-        self.recorded_audio = []
-        self.recording_thread = RecordingAudioThread()
-        self.recording_thread.frames_ready.connect(self.process_frames)
+        self.close_audio_buffer()
+        if Config.DISK_CAPTURE:
+            self.audio_buffer = DiskAudioCaptureBuffer(
+                os.path.join(Config.CAPTURE_DIRECTORY, datetime.now().strftime("%H-%M-%S_%d-%m-%Y") + ".f32"),
+                sample_rate=SAMPLE_RATE,
+                live_samples=N_FRAMES * CHUNK_SIZE
+            )
+        else:
+            self.audio_buffer = AudioCaptureBuffer(sample_rate=SAMPLE_RATE, live_samples=N_FRAMES * CHUNK_SIZE)
+        if Config.CALLBACK_CAPTURE:
+            # Frames are stored from the capture writer thread, process_frames holds the mutex.
+            self.recording_thread = CallbackRecordingAudio(consumer=self.process_frames)
+            self.recording_thread.blocksDropped.connect(self.show_dropped_blocks)
+            self.recording_thread.statsReady.connect(self.show_capture_stats)
+        else:
+            self.recording_thread = RecordingAudioThread()
+            self.recording_thread.frames_ready.connect(self.process_frames)
+
+        self.cancel_streaming()
+        self.streamed_samples = 0
+        self.streaming_finish_pending = False
+        if Config.STREAMING_INFERENCE:
+            self.streaming_thread = StreamingInferenceThread()
+            self.streaming_thread.progressChanged.connect(self.update_progress)
+            self.streaming_thread.failed.connect(self.fall_back_from_streaming)
+            self.streaming_thread.countsUpdated.connect(self.update_running_counts)
+            self.streaming_thread.finalResultReady.connect(self.update_streaming_result)
+            self.streaming_thread.skippedWindowsReady.connect(self.update_skipped_windows)
+            self.streaming_thread.timelineReady.connect(self.update_timeline)
 
         self.waveform = self.page1_row4_wavegraph.plot(
             [], [], pen=self.pen
         )
+        self.waveform_renderer = WaveformRenderer(
+            self.page1_row4_wavegraph,
+            self.waveform,
+            self.audio_buffer,
+            duration=DURATION,
+            fps=Config.WAVEFORM_FPS,
+            parent=self.page1_row4_wavegraph
+        )
+        self.spectrogram_renderer = SpectrogramRenderer(
+            self.spectrogram_image,
+            self.audio_buffer,
+            duration=DURATION,
+            parent=self.page1_row4_spectrogram
+        )
 
 
+    def close_audio_buffer(self):
+        # The raw capture file is only kept if the app crashes, "Save recording" is the way to keep a session.
+        if isinstance(getattr(self, 'audio_buffer', None), DiskAudioCaptureBuffer):
+            self.audio_buffer.close(delete=True)
+
+    def closeEvent(self, event):
+        if self.recording_thread.isRunning():
+            self.recording_thread.stop()
+            self.recording_thread.wait()
+        self.cancel_inference()
+        self.cancel_streaming()
+        # Cancelled jobs finish the batch they are scoring, the audio buffer is only closed after that.
+        for thread in self.stale_threads:
+            thread.wait()
+        self.close_audio_buffer()
+        super().closeEvent(event)
+
+    def cancel_inference(self):
+        # Stale jobs stop at their next batch; they are kept referenced until their thread has finished.
+        self.stale_threads = [thread for thread in getattr(self, 'stale_threads', []) if thread.isRunning()]
+        thread = getattr(self, 'stutter_count_thread', None)
+        if thread is not None and thread.isRunning():
+            thread.cancel()
+            self.stale_threads.append(thread)
+        self.stutter_count_thread = None
+        self.modelThreads = []
+        if hasattr(self, 'page1_row3_progress_part'):
+            self.page1_row3_progress_part.hide()
+
+    def cancel_streaming(self):
+        # Unlike a finish, this drops the windows still queued for the thread.
+        self.stale_threads = [thread for thread in getattr(self, 'stale_threads', []) if thread.isRunning()]
+        thread = getattr(self, 'streaming_thread', None)
+        if thread is not None and thread.isRunning():
+            thread.cancel()
+            self.stale_threads.append(thread)
+        self.streaming_thread = None
+
     def start_recording(self):
+        self.cancel_inference()
+        self.timeline_overlay.clear()
+        self.page1_row4_graph_button_part.setChecked(False)
         if not self.recording_thread.isRunning():
             self.recording_thread.start()
+        if self.streaming_thread and not self.streaming_thread.isRunning():
+            self.streaming_thread.start()
+
+        self.syllable_count_timer.stop()
+        self.update_syllable_count()
+        self.page1_row3_result_part.setText("")
 
-        self.syllable_count = find_syllable_count_from_sentences(self.page1_row3_text_part.toPlainText())
-        self.page1_row3_result_part.setText(f"Syllable count: {self.syllable_count}\n")
+    def update_syllable_count(self):
+        self.syllable_count = self.syllable_counter.update(self.page1_row3_text_part.toPlainText())
+        self.page1_row3_syllable_part.setText(f"Syllable count: {self.syllable_count}")
 
     def pause_recording(self):
         if self.recording_thread.isRunning():
             self.recording_thread.stop()
 
+    def show_dropped_blocks(self, total):
+        self.page1_row3_capture_warning_part.setText(
+            f"Capture fell behind: {total * CHUNK_SIZE / SAMPLE_RATE:.1f} s of audio lost (replaced with silence)"
+        )
+        self.page1_row3_capture_warning_part.show()
+
+    def show_capture_stats(self, stats):
+        self.page1_row3_capture_stats_part.setText(
+            f"Capture latency: {stats['latency_p50_ms']:.0f} ms p50, {stats['latency_p95_ms']:.0f} ms p95, "
+            f"{stats['missed_blocks']} blocks lost, {stats['input_overflows']} input overflows"
+        )
+        self.page1_row3_capture_stats_part.show()
+
     def pss_calculation(self):  
         if self.recording_thread.isRunning():
             self.recording_thread.stop()
 
-        if getattr(self, 'modelThreads', None):
-            for thread in self.modelThreads:
-                if thread.isRunning():
-                    return
+        # A job still scoring an older version of the recording is replaced by a fresh one.
+        self.cancel_inference()
 
+        if self.streaming_thread:
+            # Let the last recorded frame reach process_frames before the tail is scored.
+            self.recording_thread.wait()
+            QTimer.singleShot(0, self.finish_streaming)
+            return
+
+        if Config.MULTI_HEAD_INFERENCE:
+            self.stutter_count_thread = InferenceJobThread(audio=self.audio_buffer.view())
+            self.stutter_count_thread.progressChanged.connect(self.update_progress)
+            self.stutter_count_thread.failed.connect(self.show_inference_error)
+            self.stutter_count_thread.resultReady.connect(self.update_model_count)
+            self.stutter_count_thread.aggregatedResultReady.connect(self.update_stutter_count)
+            self.stutter_count_thread.skippedWindowsReady.connect(self.update_skipped_windows)
+            self.stutter_count_thread.timelineReady.connect(self.update_timeline)
+            self.stutter_count_thread.start()
+            self.modelThreads = [self.stutter_count_thread]
+            return
+
+        audio = self.audio_buffer.view()
         modelThreads = [
-            RunModelThread(bytes_audio=self.recorded_audio, model_type="interjection"),
-            RunModelThread(bytes_audio=self.recorded_audio, model_type="prolongation"),
-            RunModelThread(bytes_audio=self.recorded_audio, model_type="repetition")
+            RunModelThread(audio=audio, model_type="interjection"),
+            RunModelThread(audio=audio, model_type="prolongation"),
+            RunModelThread(audio=audio, model_type="repetition")
         ]
         modelThreads[0].resultReady.connect(self.update_interjection_count)
         modelThreads[1].resultReady.connect(self.update_prolongation_count)
         modelThreads[2].resultReady.connect(self.update_repetition_count)
         self.stutter_count_thread = StutterCountThread(modelThreads=modelThreads)
+        self.stutter_count_thread.progressChanged.connect(self.update_progress)
+        self.stutter_count_thread.failed.connect(self.show_inference_error)
         self.stutter_count_thread.aggregatedResultReady.connect(self.update_stutter_count)
+        self.stutter_count_thread.skippedWindowsReady.connect(self.update_skipped_windows)
+        self.stutter_count_thread.timelineReady.connect(self.update_timeline)
         self.stutter_count_thread.start()
 
         self.modelThreads = modelThreads
 
+    def finish_streaming(self):
+        self.streaming_finish_pending = True
+        if not self.streaming_thread.isRunning():
+            self.streaming_thread.start()
+        # With overlapping windows the last queued window may already reach the end of the recording.
+        if self.streamed_samples and self.streamed_samples - MODEL_HOP_SAMPLES + MODEL_WINDOW_SAMPLES >= len(self.audio_buffer):
+            self.streaming_thread.finish()
+            return
+        self.streaming_thread.finish(self.audio_buffer.view(self.streamed_samples))
+
+    def fall_back_from_streaming(self, error):
+        if self.sender() is not self.streaming_thread:
+            return  # A cancelled session
+        print(f"Streaming inference failed, the recording will be scored as a whole: {error}")
+        self.cancel_streaming()
+        self.page1_row3_progress_part.hide()
+        if self.streaming_finish_pending:
+            self.streaming_finish_pending = False
+            self.page1_row3_result_part.setText("")  # Drop the running counts
+            self.pss_calculation()
+
+    def show_inference_error(self, error):
+        if self.sender() is not self.stutter_count_thread:
+            return  # Late signal from a cancelled job
+        self.page1_row3_progress_part.hide()
+        self.page1_row3_result_part.setText(f"Scoring failed: {error}\n")
+
+    def update_progress(self, done, total, eta):
+        if self.sender() not in (self.stutter_count_thread, self.streaming_thread):
+            return  # Late signal from a cancelled job
+        self.page1_row3_progress_part.setMaximum(total)
+        self.page1_row3_progress_part.setValue(done)
+        self.page1_row3_progress_part.setFormat(f"%v / %m windows, {eta:.0f} s left")
+        self.page1_row3_progress_part.setVisible(done < total)
+
+    def update_running_counts(self, counts):
+        text = ""
+        for model_type, count in counts.items():
+            text += f"Running {model_type} count: {count}\n"
+        self.page1_row3_result_part.setText(text)
+
+    def update_streaming_result(self, counts):
+        self.streaming_finish_pending = False
+        self.page1_row3_result_part.setText("")
+        for model_type, count in counts.items():
+            self.update_model_count(model_type, count)
+        self.update_stutter_count(sum(counts.values()))
+
+    def update_model_count(self, model_type, count):
+        {
+            "interjection": self.update_interjection_count,
+            "prolongation": self.update_prolongation_count,
+            "repetition": self.update_repetition_count,
+        }[model_type](count)
+
     def update_interjection_count(self, count):
         existing_text = self.page1_row3_result_part.text()
         self.page1_row3_result_part.setText(existing_text + f"Interjection count: {count}\n")
@@ -365,34 +1047,57 @@ class BetterSpeakApp(QMainWindow):
         self.page1_row3_result_part.setText(existing_text + f"Total stutter count: {count}\n")
         self.page1_row3_result_part.setText(existing_text + f"PSS : {(float(count) / self.syllable_count)*100.0} %\n")
         
+    def update_skipped_windows(self, count):
+        existing_text = self.page1_row3_result_part.text()
+        self.page1_row3_result_part.setText(existing_text + f"Silent windows skipped: {count}\n")
+
+    def update_timeline(self, timeline):
+        self.timeline = timeline
+        self.timeline_overlay.set_timeline(timeline, duration_seconds=len(self.audio_buffer) / SAMPLE_RATE)
+        self.page1_row4_graph_button_part.setChecked(True)
+        self.timeline_overlay.set_visible(True)
+
+    def play_segment(self, start_seconds, end_seconds):
+        if getattr(self, 'playing_thread', None) and self.playing_thread.isRunning():
+            return
+
+        segment = self.audio_buffer.view(int(start_seconds * SAMPLE_RATE), int(end_seconds * SAMPLE_RATE))
+        self.playing_thread = PlayingAudioThread(bytes_audio=segment.tobytes())
+        self.playing_thread.start()
+
     def play_recording(self):
         if getattr(self, 'playing_thread', None) and self.playing_thread.isRunning():
             return
     
-        self.playing_thread = PlayingAudioThread(bytes_audio=b''.join(self.recorded_audio))
+        self.playing_thread = PlayingAudioThread(bytes_audio=self.audio_buffer.as_bytes())
         self.playing_thread.start()
 
     def save_recording(self):
         if self.recording_thread.isRunning():
             self.recording_thread.stop()
         self.saving_thread = SavingAudioThread(
-            bytes_audio=b''.join(self.recorded_audio), 
+            bytes_audio=self.audio_buffer.as_bytes(),
             save_dir=self.saved_recordings_directory
             )
         self.saving_thread.start()
 
-    def process_frames(self, frames: bytes):
+    def process_frames(self, frames):
         self.mutex.lock()
         try:
-            self.recorded_audio.append(frames)
-            intensities = np.frombuffer(b''.join(self.recorded_audio[-N_FRAMES:]), dtype=np.float32)
-            time = np.linspace(0, DURATION, len(intensities))
-            self.waveform.setData(time, intensities)
+            self.audio_buffer.append(frames)
+            if self.streaming_thread:
+                while len(self.audio_buffer) - self.streamed_samples >= MODEL_WINDOW_SAMPLES:
+                    self.streaming_thread.add_window(
+                        self.audio_buffer.view(self.streamed_samples, self.streamed_samples + MODEL_WINDOW_SAMPLES)
+                    )
+                    self.streamed_samples += MODEL_HOP_SAMPLES
+            self.waveform_renderer.mark_dirty()
         finally:
             self.mutex.unlock()
         
 
     def show_page1(self):
+        self.cancel_inference()
         self.create_page1()
         self.stacked_widgets.setCurrentWidget(self.page1)
 
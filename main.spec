@@ -1,18 +1,38 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
 
+# With INFERENCE_BACKEND set to "torchscript" or "onnx" the app never builds the HuggingFace models,
+# BETTERSPEAK_EXPORTED_ONLY=1 leaves that stack out of the bundle.
+EXPORTED_ONLY_EXCLUDES = ['transformers', 'tokenizers', 'huggingface_hub', 'safetensors']
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
     datas=[
+        ('audio_buffer.py', '.'),
+        ('audio_capture.py', '.'),
         ('betterspeaklogo.jpg', '.'),
         ('config.py', '.'),
+        ('disfluency_timeline.py', '.'),
+        ('fast_checkpoint.py', '.'),
+        ('fast_mode.py', '.'),
         ('get_model_result.py', '.'),
+        ('inference_client.py', '.'),
+        ('inference_job.py', '.'),
+        ('inference_worker.py', '.'),
         ('main.py', '.'),
+        ('model_export.py', '.'),
+        ('model_precision.py', '.'),
+        ('model_registry.py', '.'),
         ('main.spec', '.'),
+        ('result_cache.py', '.'),
+        ('spectrogram.py', '.'),
         ('styles.css', '.'),
         ('syllable_counter.py', '.'),
+        ('voice_activity.py', '.'),
+        ('waveform_renderer.py', '.'),
+        ('window_merge.py', '.'),
         ('saved_recordings', 'saved_recordings'),
         ('saved_model', 'saved_model'),
         ('saved_model/interjection.ckpt', 'saved_model'),
@@ -25,7 +45,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXPORTED_ONLY_EXCLUDES if os.environ.get('BETTERSPEAK_EXPORTED_ONLY') == '1' else [],
     noarchive=False,
     optimize=0,
 )
@@ -0,0 +1,122 @@
+import argparse
+import os
+import numpy as np
+import torch
+import torch.nn as nn
+from config import Config
+
+BACKENDS = ("pytorch", "torchscript", "onnx")
+EXPORT_FORMATS = ("torchscript", "onnx")
+EXPORT_EXTENSIONS = {"torchscript": ".pt", "onnx": ".onnx"}
+WINDOW_SAMPLES = Config.SAMPLE_RATE * Config.WINDOW_SECONDS  # The input width get_batched_data produces
+
+
+def get_exported_model_path(key, export_format):
+    return os.path.join(Config.EXPORTED_MODEL_PATH, key + EXPORT_EXTENSIONS[export_format])
+
+
+class _TupleOutput(nn.Module):
+    # Traced graphs cannot return a dict, so the multi-head outputs are exported as a tuple.
+    def __init__(self, model, output_names):
+        super(_TupleOutput, self).__init__()
+        self.model = model
+        self.output_names = output_names
+
+    def forward(self, input_data):
+        logits = self.model(input_data)
+        return tuple(logits[name] for name in self.output_names)
+
+
+def export_model(key, export_format="torchscript", precision="fp32", batch_size=2):
+    from get_model_result import load_model, MULTI_HEAD_KEY
+
+    # Always trace the HuggingFace model, even when INFERENCE_BACKEND already points at an exported graph.
+    model = load_model(key, precision, backend="pytorch")
+    output_names = ["logits"]
+    if key == MULTI_HEAD_KEY:
+        output_names = list(model.model_types)
+        model = _TupleOutput(model, output_names)
+    model.eval()
+
+    example_input = torch.zeros(batch_size, WINDOW_SAMPLES)
+    export_path = get_exported_model_path(key, export_format)
+    os.makedirs(os.path.dirname(export_path), exist_ok=True)
+
+    with torch.no_grad():
+        if export_format == "torchscript":
+            traced = torch.jit.trace(model, example_input, check_trace=False)
+            traced = torch.jit.freeze(traced)
+            torch.jit.save(traced, export_path, _extra_files={"output_names": ",".join(output_names)})
+        elif export_format == "onnx":
+            torch.onnx.export(
+                model,
+                example_input,
+                export_path,
+                input_names=["input"],
+                output_names=output_names,
+                dynamic_axes={name: {0: "batch"} for name in ["input"] + output_names},
+                opset_version=17
+            )
+        else:
+            raise ValueError(f"Unknown export format {export_format!r}, expected one of {EXPORT_FORMATS}")
+    return export_path
+
+
+class TorchScriptModel:
+    def __init__(self, export_path):
+        extra_files = {"output_names": ""}
+        self.module = torch.jit.load(export_path, map_location=torch.device("cpu"), _extra_files=extra_files)
+        self.output_names = extra_files["output_names"].decode().split(",")
+        self.precision = "fp32"
+        self.memory_mb = os.path.getsize(export_path) / (1024 * 1024)
+
+    def __call__(self, input_data):
+        outputs = self.module(input_data)
+        if isinstance(outputs, tuple):
+            return dict(zip(self.output_names, outputs))
+        return outputs
+
+
+class OnnxModel:
+    def __init__(self, export_path):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx inference backend needs the onnxruntime package (pip install onnxruntime)")
+        self.session = onnxruntime.InferenceSession(export_path, providers=["CPUExecutionProvider"])
+        self.output_names = [output.name for output in self.session.get_outputs()]
+        self.precision = "fp32"
+        self.memory_mb = os.path.getsize(export_path) / (1024 * 1024)
+
+    def __call__(self, input_data):
+        outputs = self.session.run(None, {"input": np.ascontiguousarray(input_data.numpy(), dtype=np.float32)})
+        outputs = [torch.from_numpy(output) for output in outputs]
+        if self.output_names == ["logits"]:
+            return outputs[0]
+        return dict(zip(self.output_names, outputs))
+
+
+def load_exported_model(key, backend):
+    export_path = get_exported_model_path(key, backend)
+    if not os.path.exists(export_path):
+        raise FileNotFoundError(f"No exported {backend} model at {export_path}, run model_export.py first")
+    if backend == "torchscript":
+        return TorchScriptModel(export_path)
+    return OnnxModel(export_path)
+
+
+def main():
+    from get_model_result import MULTI_HEAD_KEY
+
+    parser = argparse.ArgumentParser(description="Export the detectors to TorchScript or ONNX graphs.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="torchscript")
+    parser.add_argument("--models", nargs="+", choices=list(Config.MODEL_FILES) + [MULTI_HEAD_KEY], default=list(Config.MODEL_FILES) + [MULTI_HEAD_KEY])
+    parser.add_argument("--precision", choices=("fp32", "int8"), default="fp32", help="int8 is only supported for torchscript")
+    args = parser.parse_args()
+
+    for key in args.models:
+        print(f"Exported {key} to {export_model(key, args.format, args.precision)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import contextlib
+import functools
+import torch
+import torch.nn as nn
+
+PRECISIONS = ("fp32", "int8", "bf16")
+
+
+def is_bf16_supported():
+    try:
+        return torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except (AttributeError, RuntimeError):
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_precision(precision):
+    # Cached, the CPU does not change and the fallback warning is printed once per process.
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown inference precision {precision!r}, expected one of {PRECISIONS}")
+    if precision == "bf16" and not is_bf16_supported():
+        print("bfloat16 is not supported on this CPU, falling back to fp32")
+        return "fp32"
+    return precision
+
+
+def get_precision_context(precision):
+    if precision == "bf16":
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+    return contextlib.nullcontext()
+
+
+def quantize_model(model):
+    # Dynamic int8 quantization only touches the linear layers, the conv feature extractor stays fp32.
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_empty_model(model):
+    """
+    Turns a module structure built on the meta device into an int8 model with uninitialised
+    weights, ready for a quantized state dict. Nothing is quantized, so this takes no time.
+    """
+    for module in list(model.modules()):
+        for child_name, child in list(module.named_children()):
+            if type(child) is nn.Linear:
+                setattr(module, child_name, torch.ao.nn.quantized.dynamic.Linear(
+                    child.in_features, child.out_features, bias_=child.bias is not None, dtype=torch.qint8
+                ))
+    return model.to_empty(device="cpu")
+
+
+def load_quantized_model(build_model, cache_path, source_paths=(), build_empty_model=None):
+    """
+    Returns the int8 version of `build_model()`, reusing the quantized weights saved at
+    `cache_path` unless one of `source_paths` has changed since they were written.
+    With `build_empty_model` (the same structure on the meta device) a cache hit skips
+    loading and quantizing the fp32 model altogether.
+    """
+    if os.path.exists(cache_path):
+        cache_mtime = os.path.getmtime(cache_path)
+        if all(os.path.getmtime(path) <= cache_mtime for path in source_paths if os.path.exists(path)):
+            state_dict = torch.load(cache_path, map_location=torch.device("cpu"))
+            if build_empty_model is not None and state_dict:
+                try:
+                    model = quantize_empty_model(build_empty_model())
+                    model.load_state_dict(state_dict)
+                    return model.eval()
+                except RuntimeError as e:
+                    print(f"Error while loading the quantized model from {cache_path}, quantizing again: {e}")
+            else:
+                model = quantize_model(build_model())
+                model.load_state_dict(state_dict)
+                return model
+
+    model = quantize_model(build_model())
+    # wav2vec2 uses a weight-norm parametrization, so only the state dict can be serialized.
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    torch.save(model.state_dict(), cache_path + ".tmp")
+    os.replace(cache_path + ".tmp", cache_path)
+    return model
@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+
+
+def get_model_memory_mb(model):
+    # Exported graphs report the size of their file, their weights are not module parameters.
+    if hasattr(model, "memory_mb"):
+        return model.memory_mb
+    n_bytes = 0
+    for value in model.state_dict().values():
+        # Dynamic int8 layers keep their packed (weight, bias) as a tuple instead of parameters.
+        for tensor in value if isinstance(value, tuple) else (value,):
+            if hasattr(tensor, "element_size"):
+                n_bytes += tensor.numel() * tensor.element_size()
+    return n_bytes / (1024 * 1024)
+
+
+class ModelRegistry:
+    """
+    Keeps loaded models warm for the lifetime of the process.
+
+    Models are built lazily through `loader(key)` the first time they are asked for.
+    When `max_memory_mb` is set, the least recently used models are evicted once the
+    resident models go over the cap (the model being returned is never evicted).
+    """
+
+    def __init__(self, loader, max_memory_mb=None):
+        self.loader = loader
+        self.max_memory_mb = max_memory_mb
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key):
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model, the others wait for it and reuse it.
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+
+            model = self.loader(key)
+            size = get_model_memory_mb(model)
+
+            with self._lock:
+                self._models[key] = model
+                self._sizes[key] = size
+                self._evict_if_necessary()
+            return model
+
+    def preload(self, keys, background=True):
+        def _load_all():
+            for key in keys:
+                try:
+                    self.get(key)
+                except Exception as e:
+                    print(f"Error while preloading model {key}: {e}")
+
+        if not background:
+            _load_all()
+            return None
+        thread = threading.Thread(target=_load_all, name="ModelRegistryPreload", daemon=True)
+        thread.start()
+        return thread
+
+    def is_loaded(self, key):
+        with self._lock:
+            return key in self._models
+
+    def memory_mb(self):
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def evict(self, key):
+        with self._lock:
+            self._models.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+
+    def _evict_if_necessary(self):
+        if self.max_memory_mb is None:
+            return
+        while len(self._models) > 1 and sum(self._sizes.values()) > self.max_memory_mb:
+            key, _ = self._models.popitem(last=False)
+            self._sizes.pop(key, None)
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def window_digest(window):
+    return hashlib.blake2b(memoryview(np.ascontiguousarray(window)), digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of per-window results, `key -> (probability, speech)`.
+
+    Keys are built by the caller from the window digest, the model type and the checkpoint
+    version. When `path` is set, every entry is also written to a SQLite file so results
+    survive restarts; entries found on disk are promoted back into memory.
+    """
+
+    def __init__(self, max_entries=100000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, probability REAL, speech INTEGER)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Error while opening result cache {path}: {e}")
+                self._db = None
+
+    def get_many(self, keys):
+        values = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for index, key in enumerate(keys):
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    values[index] = self._entries[key]
+                else:
+                    missing.append(index)
+
+            if missing and self._db is not None:
+                found = self._read_from_disk([keys[index] for index in missing])
+                for index in missing:
+                    if keys[index] in found:
+                        values[index] = found[keys[index]]
+                        self._entries[keys[index]] = values[index]
+                self._evict_if_necessary()
+        return values
+
+    def put_many(self, entries):
+        with self._lock:
+            self._entries.update(entries)
+            for key in entries:
+                self._entries.move_to_end(key)
+            self._evict_if_necessary()
+
+            if self._db is not None:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                        [(key, probability, int(speech)) for key, (probability, speech) in entries.items()]
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Error while writing result cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _read_from_disk(self, keys, chunk_size=500):
+        found = {}
+        try:
+            for start in range(0, len(keys), chunk_size):
+                chunk = keys[start:start + chunk_size]
+                rows = self._db.execute(
+                    f"SELECT key, probability, speech FROM results WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                for key, probability, speech in rows:
+                    found[key] = (probability, bool(speech))
+        except sqlite3.Error as e:
+            print(f"Error while reading result cache: {e}")
+        return found
+
+    def _evict_if_necessary(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,111 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from PyQt5.QtCore import QObject, QTimer
+
+
+def mel_filterbank(sample_rate=16000, n_fft=400, n_mels=64, f_min=0.0, f_max=None):
+    # Triangular HTK-style mel filters, shape (n_fft // 2 + 1, n_mels).
+    f_max = f_max or sample_rate / 2
+    to_mel = lambda f: 2595 * np.log10(1 + f / 700)
+    to_hz = lambda m: 700 * (10 ** (m / 2595) - 1)
+    mel_points = to_hz(np.linspace(to_mel(f_min), to_mel(f_max), n_mels + 2))
+    fft_freqs = np.linspace(0, sample_rate / 2, n_fft // 2 + 1)
+    lower, center, upper = mel_points[:-2], mel_points[1:-1], mel_points[2:]
+    rising = (fft_freqs[:, None] - lower) / (center - lower)
+    falling = (upper - fft_freqs[:, None]) / (upper - center)
+    return np.maximum(0, np.minimum(rising, falling)).astype(np.float32)
+
+
+class IncrementalLogMelSpectrogram:
+    """
+    Log-mel spectrogram that only computes the STFT columns for newly added samples.
+
+    Samples that do not fill a whole frame yet are carried over to the next call. Columns
+    go into a bounded ring (written twice, like AudioCaptureBuffer's live ring), so
+    `columns()` is always one contiguous array of at most `max_columns` frames and the
+    cost per call does not grow with the session length.
+    """
+
+    def __init__(self, sample_rate=16000, n_fft=400, hop_length=160, n_mels=64, max_columns=500):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.max_columns = max_columns
+        self.window = np.hanning(n_fft).astype(np.float32)
+        self.filterbank = mel_filterbank(sample_rate, n_fft, n_mels)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._ring = np.full((2 * max_columns, n_mels), -100, dtype=np.float32)
+        self._position = 0
+        self.n_columns = 0
+
+    def process(self, samples):
+        samples = np.concatenate([self._pending, np.asarray(samples, dtype=np.float32)])
+        n_frames = 0 if len(samples) < self.n_fft else 1 + (len(samples) - self.n_fft) // self.hop_length
+        if n_frames == 0:
+            self._pending = samples
+            return
+        frames = as_strided(
+            samples,
+            shape=(n_frames, self.n_fft),
+            strides=(samples.strides[0] * self.hop_length, samples.strides[0]),
+            writeable=False
+        )
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+        log_mel = 10 * np.log10(power @ self.filterbank + 1e-10)
+        self._append_columns(log_mel.astype(np.float32))
+        self._pending = samples[n_frames * self.hop_length:].copy()
+
+    def _append_columns(self, columns):
+        self.n_columns += len(columns)
+        columns = columns[-self.max_columns:]
+        rows = (self._position + np.arange(len(columns))) % self.max_columns
+        self._ring[rows] = columns
+        self._ring[rows + self.max_columns] = columns
+        self._position = (self._position + len(columns)) % self.max_columns
+
+    def columns(self):
+        # Oldest first, shape (max_columns, n_mels); unfilled columns hold the floor value.
+        return self._ring[self._position:self._position + self.max_columns]
+
+
+class SpectrogramRenderer(QObject):
+    """
+    Feeds the samples captured since the last tick into an IncrementalLogMelSpectrogram
+    and shows its column buffer in a pyqtgraph ImageItem.
+    """
+
+    def __init__(self, image_item, audio_buffer, duration=5, fps=20, levels=(-60, 30), parent=None):
+        super().__init__(parent)
+        self.image_item = image_item
+        self.duration = duration
+        self.levels = levels
+        self.enabled = False
+        self.set_audio_buffer(audio_buffer)
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(1000 / fps))
+        self.timer.timeout.connect(self.update)
+
+    def set_audio_buffer(self, audio_buffer):
+        self.audio_buffer = audio_buffer
+        self.spectrogram = IncrementalLogMelSpectrogram(
+            sample_rate=audio_buffer.sample_rate,
+            max_columns=int(self.duration * audio_buffer.sample_rate / 160)
+        )
+        self.processed_samples = 0
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled:
+            # Only the visible span is computed when the view is switched on mid-session.
+            visible_samples = self.spectrogram.max_columns * self.spectrogram.hop_length
+            self.processed_samples = max(self.processed_samples, len(self.audio_buffer) - visible_samples)
+            self.update()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def update(self):
+        if len(self.audio_buffer) > self.processed_samples:
+            self.spectrogram.process(self.audio_buffer.view(self.processed_samples))
+            self.processed_samples = len(self.audio_buffer)
+        self.image_item.setImage(self.spectrogram.columns(), autoLevels=False, levels=self.levels)
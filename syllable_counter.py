@@ -1,14 +1,54 @@
-from nltk.tokenize import SyllableTokenizer, RegexpTokenizer
+from collections import Counter
+from functools import lru_cache
+
+# NLTK is imported on first use, the tokenizers are then shared by every call.
+_word_tokenizer = None
+_syllable_tokenizer = None
+
+
+def _get_tokenizers():
+    global _word_tokenizer, _syllable_tokenizer
+    if _word_tokenizer is None:
+        from nltk.tokenize import RegexpTokenizer, SyllableTokenizer
+        _syllable_tokenizer = SyllableTokenizer()
+        _word_tokenizer = RegexpTokenizer(r"\w+")
+    return _word_tokenizer, _syllable_tokenizer
+
 
 def find_syllable_count_from_sentences(sentence):
-    word_tokenizer = RegexpTokenizer(r"\w+")
-    words = word_tokenizer.tokenize(sentence)
-    count = 0
-    for word in words:
-        count += find_syllable_count_from_word(word)
-    return count
+    word_tokenizer, _ = _get_tokenizers()
+    return find_syllable_count_from_words(word_tokenizer.tokenize(sentence))
+
+def find_syllable_count_from_words(words):
+    # Each distinct word is counted once, long passages repeat the same words a lot.
+    return sum(find_syllable_count_from_word(word) * n for word, n in Counter(words).items())
 
+@lru_cache(maxsize=50000)
 def find_syllable_count_from_word(word):
-    syllable_tokenizer = SyllableTokenizer()
+    _, syllable_tokenizer = _get_tokenizers()
     syllables = syllable_tokenizer.tokenize(word) 
-    return len(syllables)
\ No newline at end of file
+    return len(syllables)
+
+
+class ParagraphSyllableCounter:
+    """
+    Keeps the syllable count of a text that is being edited. Paragraphs are cached by
+    their content, so after an edit only the paragraphs that changed are tokenized again.
+    """
+
+    def __init__(self):
+        self._paragraph_counts = {}
+        self.count = 0
+
+    def update(self, text):
+        paragraph_counts = {}
+        count = 0
+        for paragraph in text.split("\n"):
+            if paragraph not in paragraph_counts:
+                paragraph_counts[paragraph] = self._paragraph_counts.get(paragraph)
+                if paragraph_counts[paragraph] is None:
+                    paragraph_counts[paragraph] = find_syllable_count_from_sentences(paragraph)
+            count += paragraph_counts[paragraph]
+        self._paragraph_counts = paragraph_counts
+        self.count = count
+        return count
@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from audio_capture import TimestampedFrameQueue
+
+
+def put_blocks(frame_queue, first, last):
+    for i in range(first, last):
+        frame_queue.put(float(i), np.full(4, i, dtype=np.float32))
+
+
+def block_ids(blocks):
+    return [int(samples[0]) for _, samples in blocks]
+
+
+class FrameQueueReaderTest(unittest.TestCase):
+    def test_reader_capacity_behind_loses_nothing(self):
+        frame_queue = TimestampedFrameQueue(4)
+        reader = frame_queue.reader()
+        put_blocks(frame_queue, 0, 4)
+        self.assertEqual(block_ids(reader.read()), [0, 1, 2, 3])
+        self.assertEqual(reader.missed_blocks, 0)
+
+    def test_reader_lapped_by_writer_counts_lost_blocks(self):
+        frame_queue = TimestampedFrameQueue(4)
+        reader = frame_queue.reader()
+        put_blocks(frame_queue, 0, 3)
+        reader.read()
+        put_blocks(frame_queue, 3, 10)
+        self.assertEqual(block_ids(reader.read()), [6, 7, 8, 9])
+        self.assertEqual(reader.missed_blocks, 3)
+
+    def test_slot_overwritten_during_copy_is_dropped(self):
+        frame_queue = TimestampedFrameQueue(4)
+        reader = frame_queue.reader()
+        put_blocks(frame_queue, 0, 4)
+
+        class LappingSlots(list):
+            # The writer puts three more blocks while the reader is copying slot 2.
+            def __getitem__(self, index):
+                if index == 2 and frame_queue.sequence == 4:
+                    put_blocks(frame_queue, 4, 7)
+                return list.__getitem__(self, index)
+
+        frame_queue._slots = LappingSlots(frame_queue._slots)
+        self.assertEqual(block_ids(reader.read()), [3])
+        self.assertEqual(reader.missed_blocks, 3)
+        self.assertEqual(block_ids(reader.read()), [4, 5, 6])
+        self.assertEqual(reader.missed_blocks, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def get_speech_windows(
+        windows,
+        sample_rate=16000,
+        frame_duration_ms=25,
+        energy_threshold_db=-40.0,
+        zcr_threshold=0.3,
+        min_speech_ratio=0.1
+):
+    """
+    Cheap energy / zero-crossing voice activity detection over a batch of windows.
+
+    A frame counts as speech when it is clearly loud, or when it is moderately loud with a
+    low zero-crossing rate (voiced sound rather than hiss). A window is sent to the model
+    only if at least `min_speech_ratio` of its frames are speech.
+    Returns a boolean array with one entry per window.
+    """
+    windows = np.asarray(windows, dtype=np.float32)
+    if windows.ndim == 1:
+        windows = windows[np.newaxis, :]
+
+    frame_size = int(sample_rate * frame_duration_ms / 1000)
+    n_frames = windows.shape[1] // frame_size
+    if n_frames == 0:
+        return np.zeros(windows.shape[0], dtype=bool)
+    frames = windows[:, :n_frames * frame_size].reshape(windows.shape[0], n_frames, frame_size)
+
+    energy_db = 10 * np.log10(np.mean(np.square(frames), axis=-1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[..., 1:] != signs[..., :-1], axis=-1)
+
+    loud = energy_db > energy_threshold_db + 10
+    voiced = (energy_db > energy_threshold_db) & (zcr < zcr_threshold)
+    speech_ratio = np.mean(loud | voiced, axis=-1)
+    return speech_ratio >= min_speech_ratio
@@ -0,0 +1,131 @@
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer
+
+
+def minmax_decimate(samples, bin_size):
+    """
+    Reduces `samples` to a (min, max) pair per `bin_size` samples, interleaved so that
+    drawing them as one line keeps every peak visible. The last bin may be partial.
+    """
+    n_bins = -(-len(samples) // bin_size)
+    if n_bins == 0:
+        return np.zeros(0, dtype=np.float32)
+    full = (len(samples) // bin_size) * bin_size
+    mins = np.empty(n_bins, dtype=np.float32)
+    maxs = np.empty(n_bins, dtype=np.float32)
+    if full:
+        blocks = samples[:full].reshape(-1, bin_size)
+        mins[:full // bin_size] = blocks.min(axis=1)
+        maxs[:full // bin_size] = blocks.max(axis=1)
+    if full < len(samples):
+        mins[-1] = samples[full:].min()
+        maxs[-1] = samples[full:].max()
+    return _interleave(mins, maxs)
+
+
+def _interleave(mins, maxs):
+    out = np.empty(2 * len(mins), dtype=np.float32)
+    out[0::2] = mins
+    out[1::2] = maxs
+    return out
+
+
+class MinMaxSummary:
+    """
+    Incremental per-block min/max of a growing recording, so the full-session overview is
+    decimated from the summary instead of re-reading every sample on each redraw.
+    """
+
+    def __init__(self, block_size=256):
+        self.block_size = block_size
+        self.n_blocks = 0
+        self._mins = np.zeros(1024, dtype=np.float32)
+        self._maxs = np.zeros(1024, dtype=np.float32)
+
+    @property
+    def summarized_samples(self):
+        return self.n_blocks * self.block_size
+
+    def update(self, audio_buffer):
+        n_new = (len(audio_buffer) - self.summarized_samples) // self.block_size
+        if n_new <= 0:
+            return
+        blocks = audio_buffer.view(self.summarized_samples, self.summarized_samples + n_new * self.block_size)
+        blocks = blocks.reshape(n_new, self.block_size)
+        if self.n_blocks + n_new > len(self._mins):
+            capacity = max(2 * len(self._mins), self.n_blocks + n_new)
+            self._mins = np.concatenate([self._mins[:self.n_blocks], np.zeros(capacity - self.n_blocks, dtype=np.float32)])
+            self._maxs = np.concatenate([self._maxs[:self.n_blocks], np.zeros(capacity - self.n_blocks, dtype=np.float32)])
+        self._mins[self.n_blocks:self.n_blocks + n_new] = blocks.min(axis=1)
+        self._maxs[self.n_blocks:self.n_blocks + n_new] = blocks.max(axis=1)
+        self.n_blocks += n_new
+
+    def decimate(self, n_bins):
+        group = max(1, -(-self.n_blocks // n_bins))
+        n_groups = -(-self.n_blocks // group)
+        pad = n_groups * group - self.n_blocks
+        mins = np.concatenate([self._mins[:self.n_blocks], np.full(pad, np.inf, dtype=np.float32)])
+        maxs = np.concatenate([self._maxs[:self.n_blocks], np.full(pad, -np.inf, dtype=np.float32)])
+        return _interleave(mins.reshape(n_groups, group).min(axis=1), maxs.reshape(n_groups, group).max(axis=1)), group
+
+
+class WaveformRenderer(QObject):
+    """
+    Redraws a pyqtgraph curve on a fixed QTimer tick instead of on every captured chunk.
+
+    Frames that arrive between ticks only mark the plot dirty, and each redraw sends at
+    most two points (min and max) per horizontal pixel. In live mode the last
+    `duration` seconds are shown. In overview mode the whole session is shown, decimated
+    from an incrementally maintained MinMaxSummary.
+    """
+
+    def __init__(self, plot_widget, curve, audio_buffer, duration=5, fps=30, parent=None):
+        super().__init__(parent)
+        self.plot_widget = plot_widget
+        self.curve = curve
+        self.duration = duration
+        self.overview = False
+        self.set_audio_buffer(audio_buffer)
+        self._x_cache = {}
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(1000 / fps))
+        self.timer.timeout.connect(self.redraw)
+        self.timer.start()
+
+    def set_audio_buffer(self, audio_buffer):
+        self.audio_buffer = audio_buffer
+        self.summary = MinMaxSummary()
+        self.dirty = True
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def set_overview(self, overview):
+        self.overview = overview
+        self.dirty = True
+
+    def _pixel_width(self):
+        return max(100, int(self.plot_widget.width()))
+
+    def _x_axis(self, n_points, seconds_per_point):
+        # x values only depend on the point spacing, so one preallocated axis is sliced for every redraw.
+        x = self._x_cache.get(seconds_per_point)
+        if x is None or len(x) < n_points:
+            x = np.arange(max(n_points, 2 * self._pixel_width() + 2), dtype=np.float64) * seconds_per_point
+            self._x_cache = {seconds_per_point: x}
+        return x[:n_points]
+
+    def redraw(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        sample_rate = self.audio_buffer.sample_rate
+        if self.overview:
+            self.summary.update(self.audio_buffer)
+            y, group = self.summary.decimate(self._pixel_width())
+            seconds_per_point = group * self.summary.block_size / sample_rate / 2
+        else:
+            bin_size = max(1, -(-self.audio_buffer.live_samples // self._pixel_width()))
+            y = minmax_decimate(self.audio_buffer.live_view(), bin_size)
+            seconds_per_point = bin_size / sample_rate / 2
+        self.curve.setData(self._x_axis(len(y), seconds_per_point), y)
@@ -0,0 +1,44 @@
+import numpy as np
+from config import Config
+
+
+def get_hop_seconds(hop_seconds=None, window_seconds=None):
+    # An explicit hop wins over Config.WINDOW_HOP_SECONDS, None in both keeps the windows back to back.
+    return hop_seconds or Config.WINDOW_HOP_SECONDS or window_seconds or Config.WINDOW_SECONDS
+
+
+def count_windows(n_samples, window_samples, hop_samples):
+    # At least one window, the last one is zero padded when the recording does not end on a window boundary.
+    return -(-max(n_samples - window_samples, 0) // hop_samples) + 1
+
+
+def get_event_runs(predictions):
+    """
+    Finds runs of consecutive positive windows in a (n_windows, n_models) prediction array.
+    Returns (columns, starts, ends) as window indices, `ends` exclusive, sorted by column.
+    """
+    predictions = np.asarray(predictions)
+    if predictions.ndim == 1:
+        predictions = predictions[:, np.newaxis]
+    padded = np.zeros((predictions.shape[0] + 2, predictions.shape[1]), dtype=np.int8)
+    padded[1:-1] = predictions != 0
+    edges = np.diff(padded, axis=0).T
+    columns, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return columns, starts, ends
+
+
+def count_events(predictions, window_seconds=3, hop_seconds=None):
+    """
+    De-duplicated event counts per column of a (n_windows, n_models) prediction array.
+
+    With overlapping windows one disfluency is detected by every window that contains it, so a
+    run of L positive windows counts as ceil(L * hop / window) events, i.e. one per window length
+    of audio it covers. Without overlap (hop == window) this is just the number of positive windows.
+    """
+    hop_seconds = hop_seconds or window_seconds
+    predictions = np.asarray(predictions)
+    n_columns = 1 if predictions.ndim == 1 else predictions.shape[1]
+    columns, starts, ends = get_event_runs(predictions)
+    events = np.ceil(np.round((ends - starts) * hop_seconds / window_seconds, 6))
+    return np.bincount(columns, weights=events, minlength=n_columns).astype(int)